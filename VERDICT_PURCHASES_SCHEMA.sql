@@ -16,80 +16,107 @@ CREATE TABLE verdict_purchases (
   validity_days INTEGER NOT NULL, -- 30, 90, 180
   expiration_date TIMESTAMPTZ NOT NULL,
   status VARCHAR(50) DEFAULT 'completed', -- 'pending', 'completed', 'failed', 'refunded'
+  balance_counted BOOLEAN NOT NULL DEFAULT FALSE, -- Maintained by trigger: completed and not yet expired
   FOREIGN KEY (user_email) REFERENCES gavl_users(email) ON DELETE CASCADE
 );
 
 -- Verdict Usage Table
+-- Range-partitioned by month on usage_date so history queries and retention
+-- pruning only touch the relevant partitions (see create/prune functions below)
 CREATE TABLE verdict_usage (
-  id BIGSERIAL PRIMARY KEY,
+  id BIGSERIAL,
   user_email VARCHAR(255) NOT NULL,
   case_id VARCHAR(100) NOT NULL,
   verdict_type VARCHAR(50) NOT NULL, -- 'trial', 'purchased'
   purchase_id BIGINT, -- References verdict_purchases if purchased
-  usage_date TIMESTAMPTZ DEFAULT NOW(),
-  case_metadata JSONB, -- Store case details for analytics
+  usage_date TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  case_metadata JSONB, -- Case details for analytics; NULL when none supplied
+  PRIMARY KEY (id, usage_date),
   FOREIGN KEY (user_email) REFERENCES gavl_users(email) ON DELETE CASCADE,
   FOREIGN KEY (purchase_id) REFERENCES verdict_purchases(id) ON DELETE SET NULL
+) PARTITION BY RANGE (usage_date);
+
+-- Catches rows outside the pre-created monthly partitions
+CREATE TABLE verdict_usage_default PARTITION OF verdict_usage DEFAULT;
+
+-- User Verdict Balances Table
+-- One row per user, kept current by the triggers below so balance lookups
+-- read a single row instead of re-aggregating verdict_usage and
+-- verdict_purchases. Usage counters are cumulative: deleting usage history
+-- does not refund verdicts.
+CREATE TABLE user_verdict_balances (
+  email VARCHAR(255) PRIMARY KEY,
+  trial_verdicts INTEGER NOT NULL DEFAULT 2,
+  trial_expires_at TIMESTAMPTZ, -- enrollment_date + 15 days (trial valid while day count <= 14)
+  trial_used INTEGER NOT NULL DEFAULT 0,
+  purchased_total INTEGER NOT NULL DEFAULT 0, -- Sum of verdicts_purchased where balance_counted
+  purchased_used INTEGER NOT NULL DEFAULT 0,
+  leased INTEGER NOT NULL DEFAULT 0, -- Sum of verdict_leases.remaining for this user
+  next_purchase_expiration TIMESTAMPTZ, -- Earliest expiration_date among counted purchases
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
+  FOREIGN KEY (email) REFERENCES gavl_users(email) ON DELETE CASCADE
+);
+
+-- Verdict Leases Table
+-- Verdicts reserved by an API instance so it can charge predictions without a
+-- database call each time (see reserve_verdicts). Leased verdicts are not
+-- available to other callers until they are recorded, released or expire.
+CREATE TABLE verdict_leases (
+  id BIGSERIAL PRIMARY KEY,
+  user_email VARCHAR(255) NOT NULL REFERENCES gavl_users(email) ON DELETE CASCADE,
+  remaining INTEGER NOT NULL, -- Leased verdicts not yet recorded as usage
+  expires_at TIMESTAMPTZ NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 -- User Verdicts Balance View
+-- Kept for existing queries; reads the maintained balances table.
 CREATE OR REPLACE VIEW user_verdict_balance AS
 SELECT
   u.email,
   u.name,
   -- Trial verdicts (always 2 if within 14 days)
   CASE
-    WHEN EXTRACT(DAY FROM (NOW() - u.enrollment_date)) <= 14 THEN 2
+    WHEN NOW() < b.trial_expires_at THEN b.trial_verdicts
     ELSE 0
-  END - COALESCE(trial_used.count, 0) AS trial_verdicts_remaining,
+  END - b.trial_used AS trial_verdicts_remaining,
 
   -- Purchased verdicts
-  COALESCE(purchased.total_verdicts, 0) - COALESCE(purchased_used.count, 0) AS purchased_verdicts_remaining,
+  b.purchased_total - b.purchased_used AS purchased_verdicts_remaining,
 
   -- Total available verdicts
   (CASE
-    WHEN EXTRACT(DAY FROM (NOW() - u.enrollment_date)) <= 14 THEN 2
+    WHEN NOW() < b.trial_expires_at THEN b.trial_verdicts
     ELSE 0
-  END - COALESCE(trial_used.count, 0)) +
-  (COALESCE(purchased.total_verdicts, 0) - COALESCE(purchased_used.count, 0)) AS total_verdicts_available
+  END - b.trial_used) +
+  (b.purchased_total - b.purchased_used) AS total_verdicts_available
 
 FROM gavl_users u
-
--- Count trial verdicts used
-LEFT JOIN (
-  SELECT user_email, COUNT(*) as count
-  FROM verdict_usage
-  WHERE verdict_type = 'trial'
-  GROUP BY user_email
-) trial_used ON u.email = trial_used.user_email
-
--- Sum purchased verdicts (only non-expired)
-LEFT JOIN (
-  SELECT user_email, SUM(verdicts_purchased) as total_verdicts
-  FROM verdict_purchases
-  WHERE status = 'completed'
-    AND expiration_date > NOW()
-  GROUP BY user_email
-) purchased ON u.email = purchased.user_email
-
--- Count purchased verdicts used
-LEFT JOIN (
-  SELECT user_email, COUNT(*) as count
-  FROM verdict_usage
-  WHERE verdict_type = 'purchased'
-  GROUP BY user_email
-) purchased_used ON u.email = purchased_used.user_email;
+JOIN user_verdict_balances b ON b.email = u.email;
 
 -- Indexes for performance
 CREATE INDEX idx_verdict_purchases_email ON verdict_purchases(user_email);
 CREATE INDEX idx_verdict_purchases_stripe ON verdict_purchases(stripe_payment_id);
 CREATE INDEX idx_verdict_purchases_expiration ON verdict_purchases(expiration_date);
-CREATE INDEX idx_verdict_usage_email ON verdict_usage(user_email);
+CREATE INDEX idx_verdict_purchases_counted ON verdict_purchases(user_email, purchase_date)
+  WHERE balance_counted;
+CREATE INDEX idx_verdict_usage_email ON verdict_usage(user_email, usage_date);
 CREATE INDEX idx_verdict_usage_purchase ON verdict_usage(purchase_id);
+CREATE INDEX idx_verdict_leases_email ON verdict_leases(user_email, expires_at);
+CREATE INDEX idx_verdict_balances_expiration ON user_verdict_balances(next_purchase_expiration)
+  WHERE next_purchase_expiration IS NOT NULL;
 
 -- Row Level Security Policies
 ALTER TABLE verdict_purchases ENABLE ROW LEVEL SECURITY;
 ALTER TABLE verdict_usage ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_verdict_balances ENABLE ROW LEVEL SECURITY;
+ALTER TABLE verdict_leases ENABLE ROW LEVEL SECURITY; -- No policies: service role only
+
+-- RLS on verdict_usage does not apply to queries against its partitions, so
+-- those are closed to clients and only reachable through verdict_usage.
+-- Monthly partitions get the same in create_verdict_usage_partitions.
+ALTER TABLE verdict_usage_default ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON verdict_usage_default FROM anon, authenticated;
 
 -- Users can view their own purchases
 CREATE POLICY "Users can view own purchases" ON verdict_purchases
@@ -99,6 +126,10 @@ CREATE POLICY "Users can view own purchases" ON verdict_purchases
 CREATE POLICY "Users can view own usage" ON verdict_usage
   FOR SELECT USING (auth.jwt() ->> 'email' = user_email);
 
+-- Users can view their own balance
+CREATE POLICY "Users can view own balance" ON user_verdict_balances
+  FOR SELECT USING (auth.jwt() ->> 'email' = email);
+
 -- Public insert for purchases (webhook will confirm)
 CREATE POLICY "Public can insert purchases" ON verdict_purchases
   FOR INSERT WITH CHECK (true);
@@ -107,6 +138,283 @@ CREATE POLICY "Public can insert purchases" ON verdict_purchases
 CREATE POLICY "Public can insert usage" ON verdict_usage
   FOR INSERT WITH CHECK (true);
 
+-- ============================================================
+-- Balance maintenance triggers
+-- ============================================================
+
+-- Create balance rows for the given users if they do not exist yet
+CREATE OR REPLACE FUNCTION ensure_verdict_balances(p_emails VARCHAR(255)[])
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO user_verdict_balances (email, trial_expires_at)
+  SELECT u.email, u.enrollment_date + INTERVAL '15 days'
+  FROM gavl_users u
+  WHERE u.email = ANY(p_emails)
+  ON CONFLICT (email) DO NOTHING;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- New users get a balance row; enrollment changes move the trial window
+CREATE OR REPLACE FUNCTION sync_verdict_balance_user()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM ensure_verdict_balances(ARRAY[NEW.email]);
+  ELSIF NEW.enrollment_date IS DISTINCT FROM OLD.enrollment_date THEN
+    UPDATE user_verdict_balances
+    SET trial_expires_at = NEW.enrollment_date + INTERVAL '15 days',
+        updated_at = NOW()
+    WHERE email = NEW.email;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER trg_gavl_users_verdict_balance
+  AFTER INSERT OR UPDATE OF enrollment_date ON gavl_users
+  FOR EACH ROW EXECUTE FUNCTION sync_verdict_balance_user();
+
+-- Decide whether a purchase counts toward the balance
+CREATE OR REPLACE FUNCTION set_purchase_balance_counted()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.balance_counted := NEW.status = 'completed' AND NEW.expiration_date > NOW();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_verdict_purchases_counted
+  BEFORE INSERT OR UPDATE ON verdict_purchases
+  FOR EACH ROW EXECUTE FUNCTION set_purchase_balance_counted();
+
+-- Apply purchase inserts, status/expiration changes, expiry and deletes
+CREATE OR REPLACE FUNCTION apply_purchase_to_balance()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_email VARCHAR(255);
+  v_delta INTEGER := 0;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.balance_counted THEN
+    v_delta := v_delta - OLD.verdicts_purchased;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.balance_counted THEN
+    v_delta := v_delta + NEW.verdicts_purchased;
+  END IF;
+
+  IF TG_OP = 'DELETE' THEN
+    v_email := OLD.user_email;
+  ELSE
+    v_email := NEW.user_email;
+  END IF;
+
+  IF v_delta = 0
+     AND TG_OP = 'UPDATE'
+     AND OLD.balance_counted = NEW.balance_counted
+     AND OLD.expiration_date = NEW.expiration_date THEN
+    RETURN NULL;
+  END IF;
+
+  PERFORM ensure_verdict_balances(ARRAY[v_email]);
+
+  UPDATE user_verdict_balances
+  SET purchased_total = purchased_total + v_delta,
+      next_purchase_expiration = (
+        SELECT MIN(expiration_date)
+        FROM verdict_purchases
+        WHERE user_email = v_email
+          AND balance_counted
+      ),
+      updated_at = NOW()
+  WHERE email = v_email;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER trg_verdict_purchases_balance
+  AFTER INSERT OR UPDATE OR DELETE ON verdict_purchases
+  FOR EACH ROW EXECUTE FUNCTION apply_purchase_to_balance();
+
+-- Count usage once per statement, grouped by user
+CREATE OR REPLACE FUNCTION apply_usage_to_balance()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM ensure_verdict_balances(ARRAY(SELECT DISTINCT user_email FROM new_usage));
+
+  UPDATE user_verdict_balances b
+  SET trial_used = b.trial_used + n.trial_count,
+      purchased_used = b.purchased_used + n.purchased_count,
+      updated_at = NOW()
+  FROM (
+    SELECT
+      user_email,
+      COUNT(*) FILTER (WHERE verdict_type = 'trial') AS trial_count,
+      COUNT(*) FILTER (WHERE verdict_type = 'purchased') AS purchased_count
+    FROM new_usage
+    GROUP BY user_email
+  ) n
+  WHERE b.email = n.user_email;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER trg_verdict_usage_balance
+  AFTER INSERT ON verdict_usage
+  REFERENCING NEW TABLE AS new_usage
+  FOR EACH STATEMENT EXECUTE FUNCTION apply_usage_to_balance();
+
+-- Expiry sweep: uncount purchases past their expiration_date.
+-- Pass an email to sweep a single user; NULL sweeps everyone.
+-- Schedule with pg_cron, e.g.:
+--   SELECT cron.schedule('expire-verdict-purchases', '*/15 * * * *',
+--                        'SELECT expire_verdict_purchases()');
+CREATE OR REPLACE FUNCTION expire_verdict_purchases(p_user_email VARCHAR(255) DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+  v_expired INTEGER;
+BEGIN
+  UPDATE verdict_purchases
+  SET balance_counted = FALSE
+  WHERE balance_counted
+    AND expiration_date <= NOW()
+    AND (p_user_email IS NULL OR user_email = p_user_email);
+
+  GET DIAGNOSTICS v_expired = ROW_COUNT;
+  RETURN v_expired;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- ============================================================
+-- Usage partition management
+-- ============================================================
+
+-- Create monthly partitions (verdict_usage_pYYYY_MM) from the current month
+-- through p_months_ahead months ahead. Safe to run repeatedly.
+-- Rows that landed in verdict_usage_default because a run was missed are moved
+-- into their month's partition; those months (even past ones) are created too.
+CREATE OR REPLACE FUNCTION create_verdict_usage_partitions(p_months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+  v_first DATE := date_trunc('month', NOW())::DATE;
+  v_last DATE := (date_trunc('month', NOW()) + make_interval(months => p_months_ahead))::DATE;
+  v_month DATE;
+  v_next DATE;
+  v_name TEXT;
+  v_created INTEGER := 0;
+BEGIN
+  -- Block writes to the default partition while rows move out of it, so
+  -- nothing for a month being attached can arrive in between
+  LOCK TABLE verdict_usage_default IN EXCLUSIVE MODE;
+
+  SELECT LEAST(v_first, date_trunc('month', MIN(usage_date))::DATE),
+         GREATEST(v_last, date_trunc('month', MAX(usage_date))::DATE)
+  INTO v_first, v_last
+  FROM verdict_usage_default;
+
+  v_month := v_first;
+  WHILE v_month <= v_last LOOP
+    v_next := (v_month + INTERVAL '1 month')::DATE;
+    v_name := 'verdict_usage_p' || to_char(v_month, 'YYYY_MM');
+
+    IF to_regclass(v_name) IS NULL THEN
+      IF EXISTS (SELECT 1 FROM verdict_usage_default
+                 WHERE usage_date >= v_month AND usage_date < v_next) THEN
+        -- Attaching would violate the default partition's constraint: build the
+        -- month as a standalone table, move its rows over, then attach it.
+        -- Rows are moved with plain INSERTs into the new table, so the usage
+        -- trigger on verdict_usage does not count them against balances again.
+        EXECUTE format('CREATE TABLE %I (LIKE verdict_usage INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                       v_name);
+        EXECUTE format(
+          'WITH moved AS (DELETE FROM verdict_usage_default
+                          WHERE usage_date >= %L AND usage_date < %L RETURNING *)
+           INSERT INTO %I SELECT * FROM moved',
+          v_month, v_next, v_name
+        );
+        EXECUTE format(
+          'ALTER TABLE verdict_usage ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+          v_name, v_month, v_next
+        );
+      ELSE
+        EXECUTE format(
+          'CREATE TABLE %I PARTITION OF verdict_usage FOR VALUES FROM (%L) TO (%L)',
+          v_name, v_month, v_next
+        );
+      END IF;
+      v_created := v_created + 1;
+    END IF;
+
+    v_month := v_next;
+  END LOOP;
+
+  -- Partitions do not inherit RLS or grants from verdict_usage, and Supabase
+  -- grants anon and authenticated on every new table
+  FOR v_name IN
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'verdict_usage'::regclass
+  LOOP
+    EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', v_name);
+    EXECUTE format('REVOKE ALL ON %I FROM anon, authenticated', v_name);
+  END LOOP;
+
+  RETURN v_created;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Drop monthly partitions older than p_retain_months, and delete rows that old
+-- from the default partition. Balances are unaffected: usage counters in
+-- user_verdict_balances are cumulative.
+CREATE OR REPLACE FUNCTION prune_verdict_usage_partitions(p_retain_months INTEGER DEFAULT 24)
+RETURNS INTEGER AS $$
+DECLARE
+  v_partition RECORD;
+  v_cutoff DATE := (date_trunc('month', NOW()) - make_interval(months => p_retain_months))::DATE;
+  v_dropped INTEGER := 0;
+BEGIN
+  FOR v_partition IN
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'verdict_usage'::regclass
+      AND c.relname ~ '^verdict_usage_p[0-9]{4}_[0-9]{2}$'
+  LOOP
+    IF to_date(substring(v_partition.relname FROM 16), 'YYYY_MM') < v_cutoff THEN
+      EXECUTE format('DROP TABLE %I', v_partition.relname);
+      v_dropped := v_dropped + 1;
+    END IF;
+  END LOOP;
+
+  DELETE FROM verdict_usage_default WHERE usage_date < v_cutoff;
+
+  RETURN v_dropped;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+SELECT create_verdict_usage_partitions(3);
+
+-- Schedule monthly with pg_cron, e.g.:
+--   SELECT cron.schedule('verdict-usage-partitions', '0 0 1 * *',
+--                        'SELECT create_verdict_usage_partitions(3); SELECT prune_verdict_usage_partitions(24)');
+
+-- Backfill balances for users that existed before this table
+INSERT INTO user_verdict_balances (
+  email, trial_expires_at, trial_used, purchased_total, purchased_used, next_purchase_expiration
+)
+SELECT
+  u.email,
+  u.enrollment_date + INTERVAL '15 days',
+  (SELECT COUNT(*) FROM verdict_usage WHERE user_email = u.email AND verdict_type = 'trial'),
+  (SELECT COALESCE(SUM(verdicts_purchased), 0) FROM verdict_purchases
+    WHERE user_email = u.email AND balance_counted),
+  (SELECT COUNT(*) FROM verdict_usage WHERE user_email = u.email AND verdict_type = 'purchased'),
+  (SELECT MIN(expiration_date) FROM verdict_purchases
+    WHERE user_email = u.email AND balance_counted)
+FROM gavl_users u
+ON CONFLICT (email) DO NOTHING;
+
 -- Function to record verdict usage
 CREATE OR REPLACE FUNCTION record_verdict_usage(
   p_user_email VARCHAR(255),
@@ -114,30 +422,60 @@ CREATE OR REPLACE FUNCTION record_verdict_usage(
   p_case_metadata JSONB DEFAULT '{}'
 ) RETURNS JSONB AS $$
 DECLARE
+  v_balance user_verdict_balances%ROWTYPE;
   v_trial_remaining INTEGER;
   v_purchased_remaining INTEGER;
   v_verdict_type VARCHAR(50);
   v_purchase_id BIGINT;
-  v_result JSONB;
 BEGIN
-  -- Check available verdicts
-  SELECT trial_verdicts_remaining, purchased_verdicts_remaining
-  INTO v_trial_remaining, v_purchased_remaining
-  FROM user_verdict_balance
-  WHERE email = p_user_email;
+  -- Lock the user's balance row so concurrent calls cannot overdraw it
+  SELECT * INTO v_balance
+  FROM user_verdict_balances
+  WHERE email = p_user_email
+  FOR UPDATE;
+
+  IF NOT FOUND THEN
+    -- First use by a user the triggers have not seen yet
+    PERFORM ensure_verdict_balances(ARRAY[p_user_email]);
+    SELECT * INTO v_balance
+    FROM user_verdict_balances
+    WHERE email = p_user_email
+    FOR UPDATE;
+  END IF;
+
+  IF v_balance.next_purchase_expiration <= NOW() THEN
+    PERFORM expire_verdict_purchases(p_user_email);
+    SELECT * INTO v_balance FROM user_verdict_balances WHERE email = p_user_email;
+  END IF;
+
+  -- Used trials outlive the trial window: clamp so they never eat into purchases
+  v_trial_remaining := GREATEST(CASE WHEN NOW() < v_balance.trial_expires_at
+                                     THEN v_balance.trial_verdicts ELSE 0 END - v_balance.trial_used, 0);
+  v_purchased_remaining := v_balance.purchased_total - v_balance.purchased_used;
+
+  -- Verdicts leased to API instances are spoken for
+  IF v_trial_remaining + v_purchased_remaining - v_balance.leased <= 0 THEN
+    RETURN jsonb_build_object(
+      'success', false,
+      'error', 'No verdicts available',
+      'trial_remaining', 0,
+      'purchased_remaining', 0
+    );
+  END IF;
 
   -- Use trial verdicts first
   IF v_trial_remaining > 0 THEN
     v_verdict_type := 'trial';
     v_purchase_id := NULL;
+    v_trial_remaining := v_trial_remaining - 1;
   ELSIF v_purchased_remaining > 0 THEN
     v_verdict_type := 'purchased';
+    v_purchased_remaining := v_purchased_remaining - 1;
     -- Get oldest non-expired purchase
     SELECT id INTO v_purchase_id
     FROM verdict_purchases
     WHERE user_email = p_user_email
-      AND status = 'completed'
-      AND expiration_date > NOW()
+      AND balance_counted
     ORDER BY purchase_date ASC
     LIMIT 1;
   ELSE
@@ -150,24 +488,231 @@ BEGIN
     );
   END IF;
 
-  -- Record usage
+  -- Record usage (trg_verdict_usage_balance decrements the locked row)
   INSERT INTO verdict_usage (user_email, case_id, verdict_type, purchase_id, case_metadata)
-  VALUES (p_user_email, p_case_id, v_verdict_type, v_purchase_id, p_case_metadata);
+  VALUES (p_user_email, p_case_id, v_verdict_type, v_purchase_id, NULLIF(p_case_metadata, '{}'::jsonb));
 
   -- Return updated balance
-  SELECT jsonb_build_object(
+  RETURN jsonb_build_object(
     'success', true,
     'verdict_type', v_verdict_type,
-    'trial_remaining', trial_verdicts_remaining,
-    'purchased_remaining', purchased_verdicts_remaining,
-    'total_remaining', total_verdicts_available
-  ) INTO v_result
-  FROM user_verdict_balance
-  WHERE email = p_user_email;
+    'trial_remaining', v_trial_remaining,
+    'purchased_remaining', v_purchased_remaining,
+    'total_remaining', v_trial_remaining + v_purchased_remaining
+  );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
 
-  RETURN v_result;
+-- Function to record usage for a batch of cases in one call.
+-- p_cases is a JSON array of {"case_id": ..., "case_metadata": {...}} objects
+-- (plain case_id strings are accepted too). The balance is checked and
+-- reserved once; the batch is all-or-nothing.
+-- With p_lease_id, cases are charged to that lease first (they were granted
+-- by reserve_verdicts, possibly as overdraft); the rest need unleased balance.
+CREATE OR REPLACE FUNCTION record_verdict_usage_bulk(
+  p_user_email VARCHAR(255),
+  p_cases JSONB,
+  p_lease_id BIGINT DEFAULT NULL
+) RETURNS JSONB AS $$
+DECLARE
+  v_balance user_verdict_balances%ROWTYPE;
+  v_requested INTEGER;
+  v_trial_remaining INTEGER;
+  v_purchased_remaining INTEGER;
+  v_trial_taken INTEGER;
+  v_purchased_taken INTEGER;
+  v_purchase_id BIGINT;
+  v_lease_remaining INTEGER;
+  v_covered INTEGER := 0;
+BEGIN
+  IF jsonb_typeof(p_cases) IS DISTINCT FROM 'array' THEN
+    RETURN jsonb_build_object('success', false, 'error', 'p_cases must be a JSON array');
+  END IF;
+
+  v_requested := jsonb_array_length(p_cases);
+  IF v_requested = 0 THEN
+    RETURN jsonb_build_object('success', false, 'error', 'No cases supplied');
+  END IF;
+
+  -- Lock the user's balance row once for the whole batch
+  SELECT * INTO v_balance
+  FROM user_verdict_balances
+  WHERE email = p_user_email
+  FOR UPDATE;
+
+  IF NOT FOUND THEN
+    -- First use by a user the triggers have not seen yet
+    PERFORM ensure_verdict_balances(ARRAY[p_user_email]);
+    SELECT * INTO v_balance
+    FROM user_verdict_balances
+    WHERE email = p_user_email
+    FOR UPDATE;
+  END IF;
+
+  IF v_balance.next_purchase_expiration <= NOW() THEN
+    PERFORM expire_verdict_purchases(p_user_email);
+    SELECT * INTO v_balance FROM user_verdict_balances WHERE email = p_user_email;
+  END IF;
+
+  v_trial_remaining := GREATEST(CASE WHEN NOW() < v_balance.trial_expires_at
+                                     THEN v_balance.trial_verdicts ELSE 0 END - v_balance.trial_used, 0);
+  -- May be negative after overdraft; the next purchase pays it back
+  v_purchased_remaining := v_balance.purchased_total - v_balance.purchased_used;
+
+  IF p_lease_id IS NOT NULL THEN
+    SELECT remaining INTO v_lease_remaining
+    FROM verdict_leases
+    WHERE id = p_lease_id AND user_email = p_user_email
+    FOR UPDATE;
+    v_covered := LEAST(v_requested, COALESCE(v_lease_remaining, 0));
+  END IF;
+
+  IF v_requested - v_covered >
+     GREATEST(COALESCE(v_trial_remaining + v_purchased_remaining - v_balance.leased, 0), 0) THEN
+    RETURN jsonb_build_object(
+      'success', false,
+      'error', 'Insufficient verdicts',
+      'requested', v_requested,
+      'lease_covered', v_covered,
+      'trial_remaining', COALESCE(v_trial_remaining, 0),
+      'purchased_remaining', GREATEST(COALESCE(v_purchased_remaining, 0), 0)
+    );
+  END IF;
+
+  IF v_covered > 0 THEN
+    UPDATE verdict_leases SET remaining = remaining - v_covered WHERE id = p_lease_id;
+    UPDATE user_verdict_balances SET leased = leased - v_covered WHERE email = p_user_email;
+  END IF;
+
+  -- Use trial verdicts first
+  v_trial_taken := LEAST(v_requested, v_trial_remaining);
+  v_purchased_taken := v_requested - v_trial_taken;
+
+  IF v_purchased_taken > 0 THEN
+    -- Get oldest non-expired purchase
+    SELECT id INTO v_purchase_id
+    FROM verdict_purchases
+    WHERE user_email = p_user_email
+      AND balance_counted
+    ORDER BY purchase_date ASC
+    LIMIT 1;
+  END IF;
+
+  -- One statement for the whole batch; the usage trigger updates the balance once
+  INSERT INTO verdict_usage (user_email, case_id, verdict_type, purchase_id, case_metadata)
+  SELECT
+    p_user_email,
+    COALESCE(c.elem ->> 'case_id', c.elem #>> '{}'),
+    CASE WHEN c.ord <= v_trial_taken THEN 'trial' ELSE 'purchased' END,
+    CASE WHEN c.ord <= v_trial_taken THEN NULL ELSE v_purchase_id END,
+    CASE WHEN jsonb_typeof(c.elem) = 'object'
+         THEN NULLIF(c.elem -> 'case_metadata', '{}'::jsonb) END
+  FROM jsonb_array_elements(p_cases) WITH ORDINALITY AS c(elem, ord);
+
+  RETURN jsonb_build_object(
+    'success', true,
+    'recorded', v_requested,
+    'lease_covered', v_covered,
+    'trial_used', v_trial_taken,
+    'purchased_used', v_purchased_taken,
+    'trial_remaining', v_trial_remaining - v_trial_taken,
+    'purchased_remaining', v_purchased_remaining - v_purchased_taken,
+    -- Unleased verdicts still available to new reservations
+    'total_remaining', v_trial_remaining + v_purchased_remaining - v_requested
+                       - (v_balance.leased - v_covered)
+  );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Reserve up to p_count verdicts for an API instance for p_ttl_seconds.
+-- Grants come out of the unleased balance plus at most p_max_overdraft
+-- verdicts beyond it, counted across every lease and past overdraft, so all
+-- instances together never serve more than the balance plus the overdraft.
+CREATE OR REPLACE FUNCTION reserve_verdicts(
+  p_user_email VARCHAR(255),
+  p_count INTEGER,
+  p_ttl_seconds INTEGER DEFAULT 60,
+  p_max_overdraft INTEGER DEFAULT 0
+) RETURNS JSONB AS $$
+DECLARE
+  v_balance user_verdict_balances%ROWTYPE;
+  v_available INTEGER;
+  v_granted INTEGER;
+  v_lease_id BIGINT;
+BEGIN
+  SELECT * INTO v_balance
+  FROM user_verdict_balances
+  WHERE email = p_user_email
+  FOR UPDATE;
+
+  IF NOT FOUND THEN
+    PERFORM ensure_verdict_balances(ARRAY[p_user_email]);
+    SELECT * INTO v_balance
+    FROM user_verdict_balances
+    WHERE email = p_user_email
+    FOR UPDATE;
+    IF NOT FOUND THEN
+      RETURN jsonb_build_object('success', false, 'error', 'User not found');
+    END IF;
+  END IF;
+
+  IF v_balance.next_purchase_expiration <= NOW() THEN
+    PERFORM expire_verdict_purchases(p_user_email);
+  END IF;
+
+  -- Reclaim leases whose instance never recorded or released them
+  WITH expired AS (
+    DELETE FROM verdict_leases
+    WHERE user_email = p_user_email AND expires_at <= NOW()
+    RETURNING remaining
+  )
+  UPDATE user_verdict_balances
+  SET leased = leased - (SELECT COALESCE(SUM(remaining), 0) FROM expired)
+  WHERE email = p_user_email
+  RETURNING * INTO v_balance;
+
+  v_available := GREATEST(CASE WHEN NOW() < v_balance.trial_expires_at
+                               THEN v_balance.trial_verdicts ELSE 0 END - v_balance.trial_used, 0)
+                 + (v_balance.purchased_total - v_balance.purchased_used)
+                 - v_balance.leased;
+  v_granted := GREATEST(LEAST(p_count, v_available + p_max_overdraft), 0);
+
+  IF v_granted > 0 THEN
+    INSERT INTO verdict_leases (user_email, remaining, expires_at)
+    VALUES (p_user_email, v_granted, NOW() + make_interval(secs => p_ttl_seconds))
+    RETURNING id INTO v_lease_id;
+
+    UPDATE user_verdict_balances SET leased = leased + v_granted WHERE email = p_user_email;
+  END IF;
+
+  RETURN jsonb_build_object(
+    'success', true,
+    'lease_id', v_lease_id,
+    'granted', v_granted,
+    'total_remaining', GREATEST(v_available - v_granted, 0)
+  );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Return a lease's unrecorded verdicts to the balance
+CREATE OR REPLACE FUNCTION release_verdicts(p_user_email VARCHAR(255), p_lease_id BIGINT)
+RETURNS JSONB AS $$
+DECLARE
+  v_released INTEGER;
+BEGIN
+  PERFORM 1 FROM user_verdict_balances WHERE email = p_user_email FOR UPDATE;
+
+  DELETE FROM verdict_leases
+  WHERE id = p_lease_id AND user_email = p_user_email
+  RETURNING remaining INTO v_released;
+
+  IF v_released IS NOT NULL THEN
+    UPDATE user_verdict_balances SET leased = leased - v_released WHERE email = p_user_email;
+  END IF;
+
+  RETURN jsonb_build_object('success', true, 'released', COALESCE(v_released, 0));
 END;
-$$ LANGUAGE plpgsql SECURITY DEFINER;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
 
 -- Function to get user verdict balance
 CREATE OR REPLACE FUNCTION get_verdict_balance(p_user_email VARCHAR(255))
@@ -175,6 +720,15 @@ RETURNS JSONB AS $$
 DECLARE
   v_result JSONB;
 BEGIN
+  -- Sweep this user's expired purchases only when one is actually due
+  IF EXISTS (
+    SELECT 1 FROM user_verdict_balances
+    WHERE email = p_user_email
+      AND next_purchase_expiration <= NOW()
+  ) THEN
+    PERFORM expire_verdict_purchases(p_user_email);
+  END IF;
+
   SELECT jsonb_build_object(
     'email', email,
     'trial_verdicts', trial_verdicts_remaining,
@@ -195,12 +749,32 @@ BEGIN
 
   RETURN v_result;
 END;
-$$ LANGUAGE plpgsql SECURITY DEFINER;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
 
 -- Grant necessary permissions
 GRANT SELECT ON user_verdict_balance TO anon, authenticated;
+GRANT SELECT ON user_verdict_balances TO anon, authenticated;
 GRANT EXECUTE ON FUNCTION record_verdict_usage(VARCHAR, VARCHAR, JSONB) TO anon, authenticated;
 GRANT EXECUTE ON FUNCTION get_verdict_balance(VARCHAR) TO anon, authenticated;
+-- Bulk recording and leases are for the API functions (service role) only.
+-- Supabase grants EXECUTE to anon and authenticated explicitly, so revoking
+-- from PUBLIC alone is not enough.
+REVOKE EXECUTE ON FUNCTION record_verdict_usage_bulk(VARCHAR, JSONB, BIGINT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION reserve_verdicts(VARCHAR, INTEGER, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION release_verdicts(VARCHAR, BIGINT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION record_verdict_usage_bulk(VARCHAR, JSONB, BIGINT) TO service_role;
+GRANT EXECUTE ON FUNCTION reserve_verdicts(VARCHAR, INTEGER, INTEGER, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION release_verdicts(VARCHAR, BIGINT) TO service_role;
+
+-- Maintenance functions are for the service role and pg_cron (postgres) only
+REVOKE EXECUTE ON FUNCTION ensure_verdict_balances(VARCHAR[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION expire_verdict_purchases(VARCHAR) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION create_verdict_usage_partitions(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION prune_verdict_usage_partitions(INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ensure_verdict_balances(VARCHAR[]) TO service_role;
+GRANT EXECUTE ON FUNCTION expire_verdict_purchases(VARCHAR) TO service_role;
+GRANT EXECUTE ON FUNCTION create_verdict_usage_partitions(INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION prune_verdict_usage_partitions(INTEGER) TO service_role;
 
 -- Sample queries for testing:
 /*
@@ -210,6 +784,13 @@ SELECT * FROM user_verdict_balance WHERE email = 'test@example.com';
 -- Record verdict usage
 SELECT record_verdict_usage('test@example.com', 'CASE-123', '{"case_type": "constitutional"}'::jsonb);
 
+-- Record a batch of cases
+SELECT record_verdict_usage_bulk('test@example.com',
+  '[{"case_id": "CASE-124"}, {"case_id": "CASE-125", "case_metadata": {"case_type": "contract"}}]'::jsonb);
+
+-- Sweep expired purchases for all users
+SELECT expire_verdict_purchases();
+
 -- View all purchases
 SELECT * FROM verdict_purchases WHERE user_email = 'test@example.com';
 
@@ -0,0 +1,72 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Supabase session verification for TheGAVL serverless functions.
+
+Clients send the access token from supabase.auth.getSession() as
+'Authorization: Bearer <token>'. Tokens are HS256 JWTs signed with the
+project's JWT secret, so they are verified locally without a network call.
+
+The leading underscore keeps Vercel from deploying this file as a function.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from typing import Dict, Any, Optional
+
+from _runtime import RequestError
+
+# Set in Vercel environment variables:
+# SUPABASE_JWT_SECRET - Project Settings > API > JWT Secret
+SUPABASE_JWT_SECRET = os.environ.get('SUPABASE_JWT_SECRET', '')
+
+# Seconds of clock skew tolerated on exp
+CLOCK_SKEW_SECONDS = 30
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+def verify_supabase_jwt(token: str, secret: Optional[str] = None) -> Dict[str, Any]:
+    """Return the claims of a valid, unexpired Supabase access token; raise RequestError(401) otherwise"""
+    secret = secret or SUPABASE_JWT_SECRET
+    if not secret:
+        raise RequestError(503, 'Authentication not configured')
+
+    try:
+        header_segment, payload_segment, signature_segment = token.split('.')
+        header = json.loads(_b64decode(header_segment))
+        claims = json.loads(_b64decode(payload_segment))
+        signature = _b64decode(signature_segment)
+    except ValueError:
+        raise RequestError(401, 'Malformed access token')
+
+    if not isinstance(header, dict) or header.get('alg') != 'HS256' or not isinstance(claims, dict):
+        raise RequestError(401, 'Unsupported access token')
+
+    expected = hmac.new(secret.encode(), f'{header_segment}.{payload_segment}'.encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected):
+        raise RequestError(401, 'Invalid access token')
+
+    expires_at = claims.get('exp')
+    if not isinstance(expires_at, (int, float)) or expires_at + CLOCK_SKEW_SECONDS < time.time():
+        raise RequestError(401, 'Access token expired')
+
+    return claims
+
+
+def authenticated_email(headers, secret: Optional[str] = None) -> str:
+    """Email of the user whose Supabase access token is in the Authorization header"""
+    scheme, _, token = (headers.get('Authorization') or '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        raise RequestError(401, 'Authorization: Bearer <access token> required')
+
+    email = verify_supabase_jwt(token.strip(), secret).get('email')
+    if not isinstance(email, str) or not email:
+        raise RequestError(401, 'Access token has no email')
+    return email
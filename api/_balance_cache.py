@@ -0,0 +1,303 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+In-process verdict balance cache for the prediction endpoint.
+
+Each instance leases a block of verdicts per user from the store
+(reserve_verdicts) and charges predictions against the lease locally, so
+the hot path only calls the database when a lease runs out. A background
+thread records queued usage against its lease with one bulk RPC per user
+and releases leases that have been replaced or are past their spend
+window, so verdicts idle on one instance go back to the others.
+
+The store grants leases out of the unleased balance plus at most
+max_overdraft verdicts, across every instance, so all instances together
+never serve more than the balance plus the overdraft. Leases are only
+spent for half their TTL, leaving the other half for queued usage to be
+recorded before the store reclaims the lease. Usage the store still
+refuses (an outage longer than that) is kept as debt and charged to the
+next lease, after the user tops up.
+
+The leading underscore keeps Vercel from deploying this file as a function.
+"""
+
+import atexit
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+# Entries are (case, enqueued_monotonic, lease_id)
+Queued = Tuple[Dict[str, Any], float, Optional[int]]
+
+
+class _Lease:
+    """Verdicts reserved from the store for one user"""
+
+    __slots__ = ('lease_id', 'remaining', 'spend_until', 'store_remaining')
+
+    def __init__(self, lease_id: Optional[int], remaining: int, spend_until: float, store_remaining: int):
+        self.lease_id = lease_id
+        self.remaining = remaining              # Not yet spent locally
+        self.spend_until = spend_until
+        self.store_remaining = store_remaining  # Unleased balance the store last reported
+
+
+class BalanceCache:
+    """Per-user verdict leases with asynchronous usage reconciliation"""
+
+    def __init__(self, store, lease_size: int = 10, lease_ttl: float = 30.0, max_overdraft: int = 0,
+                 reconcile_interval: float = 0.5):
+        self.store = store
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        self.max_overdraft = max_overdraft
+        self.reconcile_interval = reconcile_interval
+
+        self._leases: Dict[str, _Lease] = {}
+        self._pending: Dict[str, List[Queued]] = {}
+        self._retired: Dict[str, List[int]] = {}
+        self._debt: Dict[str, List[Queued]] = {}
+        self._lock = threading.Lock()
+        self._reserve_locks: Dict[str, threading.Lock] = {}
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'denied': 0,
+            'unavailable': 0,
+            'reservations': 0,
+            'reserved_verdicts': 0,
+            'released_leases': 0,
+            'reconciled': 0,
+            'reconcile_failures': 0,
+        }
+        self._last_reconcile_lag = 0.0
+        self._max_reconcile_lag = 0.0
+
+    # ------------------------------------------------------------
+    # Hot path
+    # ------------------------------------------------------------
+
+    def consume(self, user_email: str, cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Charge one verdict per case to user_email
+
+        Returns {'allowed': bool, 'verdicts_remaining': int}, plus
+        'unavailable': True when the store could not be reached. On success
+        the usage is queued for reconciliation with the store.
+        """
+        with self._lock:
+            result = self._spend(user_email, cases, time.monotonic())
+            self._stats['hits' if result else 'misses'] += 1
+            reserve_lock = self._reserve_locks.setdefault(user_email, threading.Lock())
+        if result:
+            return self._queued(result)
+
+        # Lease missing, used up or past its spend window: reserve a new one.
+        # One reservation per user at a time, so concurrent misses share its grant.
+        with reserve_lock:
+            with self._lock:
+                result = self._spend(user_email, cases, time.monotonic())
+            if result:
+                return self._queued(result)
+
+            with self._lock:
+                debt = len(self._debt.get(user_email, []))
+            reservation = self.store.reserve(user_email, max(len(cases), self.lease_size) + debt,
+                                             int(self.lease_ttl), self.max_overdraft)
+
+            with self._lock:
+                if reservation.get('retryable'):
+                    self._stats['unavailable'] += 1
+                    return {'allowed': False, 'unavailable': True, 'verdicts_remaining': 0}
+                if not reservation.get('success'):
+                    self._stats['denied'] += 1
+                    return {'allowed': False, 'verdicts_remaining': 0}
+
+                granted = int(reservation.get('granted', 0))
+                self._stats['reservations'] += 1
+                self._stats['reserved_verdicts'] += granted
+                self._install(user_email, _Lease(
+                    reservation.get('lease_id'), granted, time.monotonic() + self.lease_ttl / 2,
+                    int(reservation.get('total_remaining', 0))))
+
+                result = self._spend(user_email, cases, time.monotonic())
+                if not result:
+                    self._stats['denied'] += 1
+                    lease = self._leases[user_email]
+                    return {'allowed': False, 'verdicts_remaining': lease.remaining + lease.store_remaining}
+        return self._queued(result)
+
+    def _spend(self, user_email: str, cases: List[Dict[str, Any]], now: float) -> Optional[Dict[str, Any]]:
+        """Charge cases to the current lease if it covers them; caller holds the lock"""
+        lease = self._leases.get(user_email)
+        if lease is None or now >= lease.spend_until or lease.remaining < len(cases):
+            return None
+
+        lease.remaining -= len(cases)
+        self._pending.setdefault(user_email, []).extend((case, now, lease.lease_id) for case in cases)
+        return {'allowed': True, 'verdicts_remaining': lease.remaining + lease.store_remaining}
+
+    def _install(self, user_email: str, lease: _Lease):
+        """Replace user_email's lease, paying debt from it first; caller holds the lock"""
+        previous = self._leases.get(user_email)
+        if previous is not None and previous.lease_id is not None:
+            self._retired.setdefault(user_email, []).append(previous.lease_id)
+
+        debt = self._debt.get(user_email)
+        if debt and lease.remaining:
+            repaid = debt[:lease.remaining]
+            self._debt[user_email] = debt[len(repaid):]
+            if not self._debt[user_email]:
+                del self._debt[user_email]
+            lease.remaining -= len(repaid)
+            self._pending.setdefault(user_email, [])[:0] = [
+                (case, enqueued, lease.lease_id) for case, enqueued, _ in repaid]
+
+        self._leases[user_email] = lease
+
+    def _queued(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        self._ensure_reconciler()
+        self._wakeup.set()
+        return result
+
+    def refund(self, user_email: str, cases: List[Dict[str, Any]]):
+        """Give back verdicts for cases that were consumed but not served"""
+        with self._lock:
+            queue = self._pending.get(user_email, [])
+            lease = self._leases.get(user_email)
+            for case in cases:
+                for index, (queued, _, lease_id) in enumerate(queue):
+                    if queued is case:
+                        del queue[index]
+                        # A retired lease returns it to the store on release
+                        if lease is not None and lease.lease_id == lease_id:
+                            lease.remaining += 1
+                        break
+
+    # ------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------
+
+    def _ensure_reconciler(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='verdict-reconciler', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.reconcile_interval)
+            self._wakeup.clear()
+            # Let a burst of predictions accumulate into one bulk call
+            time.sleep(self.reconcile_interval)
+            self.flush()
+
+    def flush(self):
+        """Record all queued usage and release retired leases (also called by the background thread)"""
+        with self._flush_lock:
+            now = time.monotonic()
+            with self._lock:
+                for user_email, lease in list(self._leases.items()):
+                    if now >= lease.spend_until:
+                        del self._leases[user_email]
+                        if lease.lease_id is not None:
+                            self._retired.setdefault(user_email, []).append(lease.lease_id)
+                # Users without a lease need no reservation lock until they return
+                for user_email, reserve_lock in list(self._reserve_locks.items()):
+                    if user_email not in self._leases and not reserve_lock.locked():
+                        del self._reserve_locks[user_email]
+                batches, self._pending = self._pending, {}
+                retired, self._retired = self._retired, {}
+
+            for user_email, queued in batches.items():
+                by_lease: Dict[Optional[int], List[Queued]] = {}
+                for item in queued:
+                    by_lease.setdefault(item[2], []).append(item)
+                for lease_id, items in by_lease.items():
+                    self._reconcile(user_email, lease_id, items)
+
+            for user_email, lease_ids in retired.items():
+                for lease_id in lease_ids:
+                    self._release(user_email, lease_id)
+
+    def close(self):
+        """Record queued usage and hand every unspent lease back to the store"""
+        with self._lock:
+            for user_email, lease in self._leases.items():
+                if lease.lease_id is not None:
+                    self._retired.setdefault(user_email, []).append(lease.lease_id)
+            self._leases = {}
+        self.flush()
+
+    def _reconcile(self, user_email: str, lease_id: Optional[int], queued: List[Queued]):
+        """Record one user's queued usage for one lease; caller holds the flush lock"""
+        result = self.store.record_usage_bulk(user_email, [case for case, _, _ in queued], lease_id=lease_id)
+
+        now = time.monotonic()
+        with self._lock:
+            if result.get('retryable'):
+                # Store unreachable: put the usage back and retry next cycle
+                self._stats['reconcile_failures'] += 1
+                self._pending[user_email] = queued + self._pending.get(user_email, [])
+                return
+
+            if not result.get('success'):
+                # The lease lapsed before this was recorded and the balance is
+                # spent: charge it to the next lease
+                self._debt.setdefault(user_email, []).extend(queued)
+                return
+
+            self._stats['reconciled'] += len(queued)
+            lag = now - min(enqueued for _, enqueued, _ in queued)
+            self._last_reconcile_lag = lag
+            self._max_reconcile_lag = max(self._max_reconcile_lag, lag)
+
+            lease = self._leases.get(user_email)
+            if lease is not None and 'total_remaining' in result:
+                lease.store_remaining = max(int(result['total_remaining']), 0)
+
+    def _release(self, user_email: str, lease_id: int):
+        """Return a replaced lease to the store once none of its usage is queued"""
+        with self._lock:
+            waiting = any(queued_lease == lease_id for _, _, queued_lease in self._pending.get(user_email, []))
+        result = {'retryable': True} if waiting else self.store.release(user_email, lease_id)
+
+        with self._lock:
+            if result.get('retryable'):
+                self._retired.setdefault(user_email, []).append(lease_id)
+            else:
+                self._stats['released_leases'] += 1
+
+    # ------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate, lease usage, reconciliation lag and queue depth"""
+        now = time.monotonic()
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            oldest = min((enqueued for queue in self._pending.values() for _, enqueued, _ in queue),
+                         default=None)
+            return dict(
+                self._stats,
+                hit_rate=round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+                active_leases=len(self._leases),
+                unspent_leased=sum(lease.remaining for lease in self._leases.values()),
+                retired_leases=sum(len(ids) for ids in self._retired.values()),
+                pending_usage=sum(len(queue) for queue in self._pending.values()),
+                unrecorded_debt=sum(len(debt) for debt in self._debt.values()),
+                reconciliation_lag_s=round(now - oldest, 3) if oldest is not None else 0.0,
+                last_reconcile_lag_s=round(self._last_reconcile_lag, 3),
+                max_reconcile_lag_s=round(self._max_reconcile_lag, 3),
+                lease_size=self.lease_size,
+                lease_ttl=self.lease_ttl,
+                max_overdraft=self.max_overdraft,
+            )
@@ -0,0 +1,233 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Shared request/response runtime for TheGAVL serverless functions.
+
+Each handler declares a Route once at import time; the status lines, CORS
+headers and Content-Type header are precomputed as bytes and every response
+goes out in a single write. Uses orjson when installed, json otherwise.
+Larger bodies can be gzip- or brotli-compressed per the Accept-Encoding header.
+
+The leading underscore keeps Vercel from deploying this file as a function.
+"""
+
+import json
+import os
+import sys
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+
+    def dumps(data: Any) -> bytes:
+        # json.dumps stringifies int/None/bool keys; orjson raises without this
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+    JSON_CODEC = 'orjson'
+except ImportError:
+    _encoder = json.JSONEncoder(separators=(',', ':'))
+
+    def dumps(data: Any) -> bytes:
+        return _encoder.encode(data).encode()
+
+    loads = json.loads
+    JSON_CODEC = 'json'
+
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024  # 1 MB
+
+# Bodies smaller than this are sent uncompressed (not worth the CPU or headers)
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Dynamic responses: favour speed over ratio
+
+# Optional codecs, imported on first use to keep cold starts lean
+_optional_modules: Dict[str, Any] = {}
+
+# Set GAVL_COLDSTART_LOG=1 to log one JSON line per process (to stderr, so it
+# lands in the Vercel function logs) timing its first request
+COLDSTART_LOG = os.environ.get('GAVL_COLDSTART_LOG') == '1'
+_RUNTIME_LOADED_AT = time.perf_counter()
+
+_STATUS_LINES: Dict[tuple, bytes] = {}
+_date_cache = [0, b'']
+
+
+class RequestError(Exception):
+    """Client error raised while reading a request; carries the HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def status_line(version: str, status: int) -> bytes:
+    """Cached 'HTTP/1.x 200 OK\\r\\n' line"""
+    key = (version, status)
+    line = _STATUS_LINES.get(key)
+    if line is None:
+        try:
+            phrase = HTTPStatus(status).phrase
+        except ValueError:
+            phrase = ''
+        line = f'{version} {status} {phrase}\r\n'.encode('latin-1')
+        _STATUS_LINES[key] = line
+    return line
+
+
+def date_header() -> bytes:
+    """Date header, re-formatted at most once per second"""
+    now = int(time.time())
+    if _date_cache[0] != now:
+        _date_cache[0] = now
+        _date_cache[1] = f'Date: {formatdate(now, usegmt=True)}\r\n'.encode('latin-1')
+    return _date_cache[1]
+
+
+def optional_module(name: str) -> Any:
+    """Import an optional dependency once; None when it is not installed"""
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = __import__(name)
+        except ImportError:
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+
+def accepted_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick 'br' or 'gzip' from an Accept-Encoding header (None for identity)"""
+    if not accept_encoding:
+        return None
+
+    offered = {}
+    for item in accept_encoding.lower().split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[coding.strip()] = quality
+
+    wildcard = offered.get('*', 0.0)
+    if offered.get('br', wildcard) > 0 and optional_module('brotli') is not None:
+        return 'br'
+    if offered.get('gzip', wildcard) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress body with 'br' or 'gzip'"""
+    if encoding == 'br':
+        return optional_module('brotli').compress(body, quality=BROTLI_QUALITY)
+
+    import zlib
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+    return compressor.compress(body) + compressor.flush()
+
+
+class Route:
+    """Precomputed header blocks and limits for one API route"""
+
+    def __init__(self, methods: str, max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+                 allow_headers: str = 'Content-Type'):
+        self.methods = methods
+        self.max_body_bytes = max_body_bytes
+        self.cors_headers = (
+            'Access-Control-Allow-Origin: *\r\n'
+            f'Access-Control-Allow-Methods: {methods}\r\n'
+            f'Access-Control-Allow-Headers: {allow_headers}\r\n'
+        ).encode('latin-1')
+        self.json_headers = b'Content-Type: application/json\r\n' + self.cors_headers
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """BaseHTTPRequestHandler with shared body parsing and single-write responses"""
+
+    route = Route('POST, OPTIONS')
+    _cold = True
+
+    def handle(self):
+        if not (COLDSTART_LOG and JSONHandler._cold):
+            return super().handle()
+
+        JSONHandler._cold = False
+        started = time.perf_counter()
+        super().handle()
+        finished = time.perf_counter()
+        sys.stderr.write(json.dumps({
+            'event': 'cold_start',
+            'handler': type(self).__module__,
+            'runtime_loaded_to_first_request_ms': round((started - _RUNTIME_LOADED_AT) * 1000, 3),
+            'first_request_ms': round((finished - started) * 1000, 3),
+            'json_codec': JSON_CODEC
+        }) + '\n')
+
+    def read_body(self) -> bytes:
+        """Read the request body, enforcing the route's size limit"""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            raise RequestError(400, 'Invalid Content-Length')
+
+        if content_length < 0:
+            raise RequestError(400, 'Invalid Content-Length')
+        if content_length > self.route.max_body_bytes:
+            raise RequestError(413, f'Request body exceeds {self.route.max_body_bytes} bytes')
+
+        return self.rfile.read(content_length) if content_length else b''
+
+    def read_json(self) -> Dict[str, Any]:
+        """Read and decode the JSON request body, which must be an object"""
+        body = self.read_body()
+        if not body:
+            raise RequestError(400, 'Empty request body')
+
+        try:
+            data = loads(body)
+        except ValueError:
+            raise RequestError(400, 'Invalid JSON body')
+
+        if not isinstance(data, dict):
+            raise RequestError(400, 'JSON body must be an object')
+        return data
+
+    def send_raw(self, status_code: int, body: bytes, header_block: bytes,
+                 extra_headers: Optional[bytes] = None):
+        """Write status line, headers and body in one call"""
+        # Same access log line send_response() would have written
+        self.log_request(status_code)
+        self.wfile.write(b''.join((
+            status_line(self.protocol_version, status_code),
+            date_header(),
+            header_block,
+            extra_headers or b'',
+            b'Content-Length: %d\r\n\r\n' % len(body),
+            body
+        )))
+
+    def send_compressible(self, status_code: int, body: bytes, header_block: bytes):
+        """Send body, compressed when the client accepts it and it is large enough"""
+        encoding = None
+        if len(body) >= COMPRESS_MIN_BYTES:
+            encoding = accepted_encoding(self.headers.get('Accept-Encoding'))
+
+        if encoding is None:
+            self.send_raw(status_code, body, header_block, b'Vary: Accept-Encoding\r\n')
+        else:
+            self.send_raw(status_code, compress(body, encoding), header_block,
+                          b'Content-Encoding: %s\r\nVary: Accept-Encoding\r\n' % encoding.encode())
+
+    def send_json_response(self, status_code: int, data: Any):
+        """Send JSON response with CORS headers"""
+        self.send_raw(status_code, dumps(data), self.route.json_headers)
+
+    def do_OPTIONS(self):
+        """Handle CORS preflight"""
+        self.send_raw(200, b'', self.route.cors_headers)
@@ -0,0 +1,398 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Square API access and configuration cache for TheGAVL serverless functions.
+
+Locations and catalog pricing are fetched from Square once, persisted to a
+local cache file and refreshed in the background once older than the TTL.
+Payment intent payloads are precomputed per package from them, so creating
+an intent never waits on Square. Until the first fetch lands, intents use
+the environment configuration and the built-in package prices.
+
+The two are fetched independently: a token without ITEMS_READ (catalog
+403) still gets its locations, with the built-in package prices.
+
+Intents are HMAC-signed over package, amount, currency, idempotency key
+and expiry; process_payment charges the signed amount, so a refresh between
+quote and payment never changes what the customer pays.
+
+The leading underscore keeps Vercel from deploying this file as a function.
+"""
+
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from _runtime import RequestError, dumps, loads
+
+# Square API Configuration
+# Set these in Vercel environment variables:
+# SQUARE_ACCESS_TOKEN - Your Square access token
+# SQUARE_LOCATION_ID - Optional; defaults to the first active location on the account
+# SQUARE_ENVIRONMENT - 'sandbox' or 'production'
+# SQUARE_APPLICATION_ID / SQUARE_APPLICATION_ID_SANDBOX - Web Payments SDK application ID
+# SQUARE_API_BASE_URL - Optional override, e.g. a local stub for load testing
+
+SQUARE_ACCESS_TOKEN = os.environ.get('SQUARE_ACCESS_TOKEN', '')
+SQUARE_LOCATION_ID = os.environ.get('SQUARE_LOCATION_ID', '')
+SQUARE_ENVIRONMENT = os.environ.get('SQUARE_ENVIRONMENT', 'sandbox')
+SQUARE_API_BASE_URL = os.environ.get('SQUARE_API_BASE_URL') or (
+    'https://connect.squareupsandbox.com' if SQUARE_ENVIRONMENT == 'sandbox'
+    else 'https://connect.squareup.com'
+)
+SQUARE_APPLICATION_ID = (
+    os.environ.get('SQUARE_APPLICATION_ID_SANDBOX', 'sandbox-sq0idb-XXXXXX') if SQUARE_ENVIRONMENT == 'sandbox'
+    else os.environ.get('SQUARE_APPLICATION_ID', 'sq0idp-XXXXXX')
+)
+
+SQUARE_API_VERSION = '2024-10-17'
+SQUARE_TIMEOUT_SECONDS = 10.0
+
+# Configuration cache:
+# SQUARE_CACHE_PATH - cache file (/tmp is the only writable path on Vercel)
+# SQUARE_CACHE_TTL - seconds before cached locations and pricing are refreshed
+SQUARE_CACHE_PATH = os.environ.get('SQUARE_CACHE_PATH', '/tmp/thegavl-square-config.json')
+SQUARE_CACHE_TTL = float(os.environ.get('SQUARE_CACHE_TTL', '3600'))
+REFRESH_RETRY_SECONDS = 60.0  # Wait after a failed refresh before trying again
+
+DEFAULT_CURRENCY = 'USD'
+
+# Payment intent signing:
+# SQUARE_INTENT_SECRET - HMAC key for quoted prices (defaults to the access token)
+SQUARE_INTENT_SECRET = os.environ.get('SQUARE_INTENT_SECRET') or SQUARE_ACCESS_TOKEN
+INTENT_TTL_SECONDS = 3600  # A quote is honoured this long after create_payment
+
+
+# Square connections are opened on first use and kept alive between warm
+# invocations; one per thread since http.client connections are not shared
+_square_connections = threading.local()
+
+
+def square_request(method: str, path: str,
+                   payload: Optional[Dict[str, Any]] = None) -> Tuple[int, Dict[str, Any]]:
+    """Call the Square API and return (HTTP status, decoded JSON body)"""
+    headers = {
+        'Authorization': f'Bearer {SQUARE_ACCESS_TOKEN}',
+        'Square-Version': SQUARE_API_VERSION
+    }
+    body = None
+    if payload is not None:
+        headers['Content-Type'] = 'application/json'
+        body = dumps(payload)
+
+    # A kept-alive connection may have been closed by Square; retry once on a
+    # fresh one (payments carry an idempotency key, so a retry is safe)
+    for attempt in range(2):
+        conn = getattr(_square_connections, 'conn', None)
+        if conn is None:
+            base = urlsplit(SQUARE_API_BASE_URL)
+            conn_cls = http.client.HTTPSConnection if base.scheme == 'https' else http.client.HTTPConnection
+            conn = conn_cls(base.netloc, timeout=SQUARE_TIMEOUT_SECONDS)
+            _square_connections.conn = conn
+
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, loads(response.read() or b'{}')
+        except (http.client.HTTPException, ConnectionError):
+            conn.close()
+            _square_connections.conn = None
+            if attempt:
+                raise
+
+
+def intent_signature(package_type: str, amount: int, currency: str,
+                     idempotency_key: str, expires_at: int) -> str:
+    """HMAC binding a quoted price to one payment attempt"""
+    message = f'{package_type}|{amount}|{currency}|{idempotency_key}|{expires_at}'
+    return hmac.new(SQUARE_INTENT_SECRET.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+class SquareConfigService:
+    """Square locations and catalog pricing, cached on disk and refreshed in the background"""
+
+    def __init__(self, packages: Dict[str, Dict[str, Any]], cache_path: str = SQUARE_CACHE_PATH,
+                 ttl_seconds: float = SQUARE_CACHE_TTL):
+        self.packages = packages
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        # Cache files from another environment or API host are ignored
+        self.source_key = f'{SQUARE_ENVIRONMENT}:{SQUARE_API_BASE_URL}'
+
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.source = 'environment'
+        self.last_error: Optional[str] = None
+        self._intents: Dict[str, Dict[str, Any]] = {}
+        self._square_config: Dict[str, Any] = {}
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._retry_at = 0.0
+
+        self._apply(None, 'environment')
+
+    @property
+    def can_fetch(self) -> bool:
+        return bool(SQUARE_ACCESS_TOKEN)
+
+    @property
+    def location_id(self) -> str:
+        return self._square_config['location_id']
+
+    # ------------------------------------------------------------
+    # Serving (never blocks on Square)
+    # ------------------------------------------------------------
+
+    def package(self, package_type: str) -> Optional[Dict[str, Any]]:
+        """Precomputed package details (name, amount, currency, verdicts, validity)"""
+        self.maybe_refresh()
+        return self._intents.get(package_type)
+
+    def payment_intent(self, package_type: str, idempotency_key: str,
+                       user_email: Optional[str], user_name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """create_payment response for package_type, or None for an unknown package"""
+        base = self.package(package_type)
+        if base is None:
+            return None
+
+        expires_at = int(time.time()) + INTENT_TTL_SECONDS
+        signature = intent_signature(package_type, base['amount'], base['currency'], idempotency_key, expires_at)
+        return {
+            'success': True,
+            'payment_intent': dict(base, idempotency_key=idempotency_key, user_email=user_email,
+                                   user_name=user_name, expires_at=expires_at, signature=signature),
+            'square_config': self._square_config
+        }
+
+    def quoted_package(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Package details at the price a create_payment intent quoted
+
+        data echoes the intent's package, idempotency_key, amount, currency,
+        expires_at and signature. Raises RequestError for a tampered (400) or
+        expired (409) quote.
+        """
+        base = self._intents.get(data.get('package'))
+        if base is None:
+            raise RequestError(400, 'Invalid package type')
+
+        try:
+            amount = int(data['amount'])
+            currency = str(data['currency'])
+            expires_at = int(data['expires_at'])
+            signature = str(data['signature'])
+        except (KeyError, TypeError, ValueError):
+            raise RequestError(400, 'Payment intent amount, currency, expires_at and signature required')
+
+        expected = intent_signature(data['package'], amount, currency, str(data.get('idempotency_key')), expires_at)
+        if not hmac.compare_digest(signature, expected):
+            raise RequestError(400, 'Payment intent signature does not match')
+        if expires_at < time.time():
+            raise RequestError(409, 'Price quote expired; please start the purchase again')
+
+        return dict(base, amount=amount, currency=currency)
+
+    # ------------------------------------------------------------
+    # Loading and refreshing
+    # ------------------------------------------------------------
+
+    def warm(self):
+        """Load the cache file, then refresh in the background if it is missing or stale"""
+        snapshot = self._load()
+        if snapshot is not None:
+            self._apply(snapshot, 'cache')
+        self.maybe_refresh()
+
+    def is_stale(self) -> bool:
+        if self.snapshot is None:
+            return True
+        # A partial fetch is retried sooner than the full TTL
+        max_age = min(REFRESH_RETRY_SECONDS, self.ttl_seconds) if self.snapshot.get('errors') else self.ttl_seconds
+        return time.time() - self.snapshot['fetched_at'] >= max_age
+
+    def maybe_refresh(self):
+        """Start a background refresh when the configuration is stale (at most one at a time)"""
+        if self._refreshing or not self.can_fetch or not self.is_stale() or time.time() < self._retry_at:
+            return
+
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name='square-config-refresh',
+                         daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+
+    def refresh(self) -> Dict[str, Any]:
+        """Fetch locations and catalog pricing from Square now (blocking)"""
+        # Whichever fetch fails keeps its previous value (or the built-in
+        # defaults when there is none)
+        previous = self.snapshot or {}
+        snapshot = {
+            'source': self.source_key,
+            'fetched_at': time.time(),
+            'locations': previous.get('locations', []),
+            'catalog': previous.get('catalog', [])
+        }
+        errors = {}
+        for key, fetch in (('locations', self._fetch_locations), ('catalog', self._fetch_catalog_prices)):
+            try:
+                snapshot[key] = fetch()
+            except Exception as e:
+                errors[key] = str(e)
+
+        if errors:
+            self.last_error = '; '.join(f'{key}: {error}' for key, error in errors.items())
+            self._retry_at = time.time() + REFRESH_RETRY_SECONDS
+            if len(errors) == 2:
+                return {
+                    'success': False,
+                    'error': f'Square configuration refresh failed: {self.last_error}'
+                }
+            snapshot['errors'] = errors
+        else:
+            self.last_error = None
+
+        self._apply(snapshot, 'square')
+        self._save(snapshot)
+        result = {
+            'success': True,
+            'locations': snapshot['locations'],
+            'catalog': snapshot['catalog']
+        }
+        if errors:
+            result['errors'] = errors
+        return result
+
+    def _fetch_locations(self) -> List[Dict[str, Any]]:
+        status_code, result = square_request('GET', '/v2/locations')
+        if status_code != 200:
+            raise RuntimeError(f'locations request returned HTTP {status_code}')
+
+        return [{
+            'id': location.get('id'),
+            'name': location.get('name'),
+            'status': location.get('status'),
+            'currency': location.get('currency'),
+            'country': location.get('country'),
+            'address_line_1': location.get('address', {}).get('address_line_1')
+        } for location in result.get('locations', [])]
+
+    def _fetch_catalog_prices(self) -> List[Dict[str, Any]]:
+        """Every fixed-price item variation in the catalog"""
+        prices = []
+
+        cursor = None
+        while True:
+            path = '/v2/catalog/list?types=ITEM' + (f'&cursor={quote(cursor)}' if cursor else '')
+            status_code, result = square_request('GET', path)
+            if status_code != 200:
+                raise RuntimeError(f'catalog request returned HTTP {status_code}')
+
+            for item in result.get('objects', []):
+                item_data = item.get('item_data', {})
+                for variation in item_data.get('variations', []):
+                    variation_data = variation.get('item_variation_data', {})
+                    price = variation_data.get('price_money')
+                    if price:
+                        prices.append({
+                            'item_name': item_data.get('name', ''),
+                            'sku': variation_data.get('sku', ''),
+                            'amount': price['amount'],
+                            'currency': price.get('currency', DEFAULT_CURRENCY),
+                            'catalog_object_id': variation.get('id')
+                        })
+
+            cursor = result.get('cursor')
+            if not cursor:
+                return prices
+
+    def _apply(self, snapshot: Optional[Dict[str, Any]], source: str):
+        """Precompute the square_config block and per-package intent payloads"""
+        locations = snapshot['locations'] if snapshot else []
+        location = next((loc for loc in locations if loc['id'] == SQUARE_LOCATION_ID), None) or \
+            next((loc for loc in locations if loc.get('status') == 'ACTIVE'), None)
+        location_currency = (location or {}).get('currency') or DEFAULT_CURRENCY
+        prices = self._package_prices(snapshot['catalog'] if snapshot else [])
+
+        square_config = {
+            'application_id': SQUARE_APPLICATION_ID,
+            'location_id': SQUARE_LOCATION_ID or (location or {}).get('id', ''),
+            'environment': SQUARE_ENVIRONMENT
+        }
+
+        intents = {}
+        for package_type, info in self.packages.items():
+            price = prices.get(package_type, {})
+            intent = {
+                'package': package_type,
+                'package_name': info['name'],
+                'amount': price.get('amount', info['amount']),
+                'verdicts': info['verdicts'],
+                'validity_days': info['validity_days'],
+                'currency': price.get('currency', location_currency)
+            }
+            if price.get('catalog_object_id'):
+                intent['catalog_object_id'] = price['catalog_object_id']
+            intents[package_type] = intent
+
+        # Swap in whole so concurrent requests see either the old or the new set
+        self._intents, self._square_config = intents, square_config
+        self.snapshot, self.source = snapshot, source
+
+    def _package_prices(self, catalog: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Catalog price per package, matched by variation SKU or else by item name"""
+        names = {info['name'].lower(): package_type for package_type, info in self.packages.items()}
+        prices: Dict[str, Dict[str, Any]] = {}
+        for price in catalog:
+            package_type = price['sku'] if price['sku'] in self.packages else names.get(price['item_name'].lower())
+            if package_type and package_type not in prices:
+                prices[package_type] = price
+        return prices
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.cache_path) as cache_file:
+                snapshot = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+        if (not isinstance(snapshot, dict) or snapshot.get('source') != self.source_key
+                or not isinstance(snapshot.get('locations'), list)
+                or not isinstance(snapshot.get('catalog'), list)):
+            return None
+        return snapshot
+
+    def _save(self, snapshot: Dict[str, Any]):
+        # Write then rename so other processes never read a partial file
+        temp_path = f'{self.cache_path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'w') as cache_file:
+                json.dump(snapshot, cache_file)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            self.last_error = f'Could not write {self.cache_path}: {str(e)}'
+
+    def status(self) -> Dict[str, Any]:
+        """Where the current configuration came from and how old it is"""
+        fetched_at = self.snapshot['fetched_at'] if self.snapshot else None
+        return {
+            'source': self.source,
+            'age_seconds': round(time.time() - fetched_at, 1) if fetched_at else None,
+            'stale': self.is_stale(),
+            'refreshing': self._refreshing,
+            'last_error': self.last_error,
+            'cache_path': self.cache_path,
+            'location_id': self.location_id,
+            'prices': {package_type: intent['amount'] for package_type, intent in self._intents.items()}
+        }
@@ -0,0 +1,354 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Verdict balance and usage access for TheGAVL serverless functions.
+Calls the Supabase RPC functions defined in VERDICT_PURCHASES_SCHEMA.sql.
+SQLiteVerdictStore returns the same results from a local database, for
+exercising the balance gate without Supabase.
+
+The leading underscore keeps Vercel from deploying this file as a function.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Any, List, Optional, Union
+
+# Set these in Vercel environment variables:
+# SUPABASE_URL - Your Supabase project URL
+# SUPABASE_KEY - Service role key (RPC functions are SECURITY DEFINER)
+
+SUPABASE_URL = os.environ.get('SUPABASE_URL', '')
+SUPABASE_KEY = os.environ.get('SUPABASE_KEY', '')
+
+RPC_TIMEOUT_SECONDS = 5.0
+
+Case = Union[str, Dict[str, Any]]
+
+
+class SupabaseVerdictStore:
+    """Verdict balance operations backed by Supabase PostgREST RPC calls"""
+
+    def __init__(self, url: str = SUPABASE_URL, key: str = SUPABASE_KEY,
+                 timeout: float = RPC_TIMEOUT_SECONDS):
+        self.url = url.rstrip('/')
+        self.key = key
+        self.timeout = timeout
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.url and self.key)
+
+    def rpc(self, function: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Call a Postgres function through /rest/v1/rpc and return its JSONB result"""
+        if not self.configured:
+            return {
+                'success': False,
+                'error': 'Supabase not configured'
+            }
+
+        request = urllib.request.Request(
+            f'{self.url}/rest/v1/rpc/{function}',
+            data=json.dumps(params).encode(),
+            headers={
+                'apikey': self.key,
+                'Authorization': f'Bearer {self.key}',
+                'Content-Type': 'application/json'
+            },
+            method='POST'
+        )
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return {
+                'success': False,
+                'error': f'Supabase RPC {function} failed: HTTP {e.code}',
+                'retryable': e.code >= 500
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Supabase RPC {function} failed: {str(e)}',
+                'retryable': True
+            }
+
+    def get_balance(self, user_email: str) -> Dict[str, Any]:
+        """Current balance: trial_verdicts, purchased_verdicts, total_verdicts"""
+        return self.rpc('get_verdict_balance', {'p_user_email': user_email})
+
+    def record_usage(self, user_email: str, case_id: str,
+                     case_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record a single verdict against the user's balance"""
+        return self.rpc('record_verdict_usage', {
+            'p_user_email': user_email,
+            'p_case_id': case_id,
+            'p_case_metadata': case_metadata or {}
+        })
+
+    def record_usage_bulk(self, user_email: str, cases: List[Case],
+                          lease_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Record a batch of verdicts in one round trip
+
+        Each case is a case_id string or a dict with 'case_id' and optional
+        'case_metadata'. The batch is all-or-nothing: if the balance cannot
+        cover every case, nothing is recorded. With lease_id the cases are
+        charged to that lease (see reserve) before the unleased balance.
+        """
+        params = {
+            'p_user_email': user_email,
+            'p_cases': [normalize_case(case) for case in cases]
+        }
+        if lease_id is not None:
+            params['p_lease_id'] = lease_id
+        return self.rpc('record_verdict_usage_bulk', params)
+
+    def reserve(self, user_email: str, count: int, ttl_seconds: int,
+                max_overdraft: int = 0) -> Dict[str, Any]:
+        """Lease up to count verdicts for ttl_seconds: lease_id, granted, total_remaining"""
+        return self.rpc('reserve_verdicts', {
+            'p_user_email': user_email,
+            'p_count': count,
+            'p_ttl_seconds': ttl_seconds,
+            'p_max_overdraft': max_overdraft
+        })
+
+    def release(self, user_email: str, lease_id: int) -> Dict[str, Any]:
+        """Return a lease's unrecorded verdicts to the balance"""
+        return self.rpc('release_verdicts', {'p_user_email': user_email, 'p_lease_id': lease_id})
+
+
+class SQLiteVerdictStore:
+    """
+    Verdict balance operations against a local SQLite database
+
+    Returns the same shapes as get_verdict_balance, record_verdict_usage_bulk,
+    reserve_verdicts and release_verdicts. Purchases and expiry are not
+    modelled; balances are set directly with set_balance().
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS user_verdict_balances (
+        email TEXT PRIMARY KEY,
+        trial_remaining INTEGER NOT NULL DEFAULT 2,
+        purchased_remaining INTEGER NOT NULL DEFAULT 0,
+        leased INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS verdict_leases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_email TEXT NOT NULL,
+        remaining INTEGER NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS verdict_usage (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_email TEXT NOT NULL,
+        case_id TEXT NOT NULL,
+        verdict_type TEXT NOT NULL,
+        case_metadata TEXT,
+        usage_date TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    def set_balance(self, user_email: str, trial: int = 2, purchased: int = 0):
+        """Create or overwrite a user's balance (outstanding leases are kept)"""
+        with self._lock:
+            self.connection.execute(
+                'INSERT INTO user_verdict_balances (email, trial_remaining, purchased_remaining) VALUES (?, ?, ?) '
+                'ON CONFLICT(email) DO UPDATE SET trial_remaining = excluded.trial_remaining, '
+                'purchased_remaining = excluded.purchased_remaining',
+                (user_email, trial, purchased)
+            )
+
+    def get_balance(self, user_email: str) -> Dict[str, Any]:
+        """Current balance: trial_verdicts, purchased_verdicts, total_verdicts"""
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT trial_remaining, purchased_remaining FROM user_verdict_balances WHERE email = ?',
+                (user_email,)
+            ).fetchone()
+
+        if row is None:
+            return {
+                'error': 'User not found',
+                'trial_verdicts': 0,
+                'purchased_verdicts': 0,
+                'total_verdicts': 0
+            }
+
+        return {
+            'email': user_email,
+            'trial_verdicts': row[0],
+            'purchased_verdicts': row[1],
+            'total_verdicts': row[0] + row[1]
+        }
+
+    def record_usage(self, user_email: str, case_id: str,
+                     case_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record a single verdict against the user's balance"""
+        return self.record_usage_bulk(user_email, [{'case_id': case_id, 'case_metadata': case_metadata}])
+
+    def record_usage_bulk(self, user_email: str, cases: List[Case],
+                          lease_id: Optional[int] = None) -> Dict[str, Any]:
+        """Record a batch of verdicts, all-or-nothing, lease first, then trial verdicts first"""
+        cases = [normalize_case(case) for case in cases]
+        if not cases:
+            return {'success': False, 'error': 'No cases supplied'}
+
+        with self._lock:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                row = cursor.execute(
+                    'SELECT trial_remaining, purchased_remaining, leased FROM user_verdict_balances WHERE email = ?',
+                    (user_email,)
+                ).fetchone()
+                trial_remaining, purchased_remaining, leased = row or (0, 0, 0)
+
+                requested = len(cases)
+                covered = 0
+                if lease_id is not None:
+                    lease = cursor.execute(
+                        'SELECT remaining FROM verdict_leases WHERE id = ? AND user_email = ?',
+                        (lease_id, user_email)
+                    ).fetchone()
+                    covered = min(requested, lease[0]) if lease else 0
+
+                if requested - covered > max(trial_remaining + purchased_remaining - leased, 0):
+                    cursor.execute('ROLLBACK')
+                    return {
+                        'success': False,
+                        'error': 'Insufficient verdicts',
+                        'requested': requested,
+                        'lease_covered': covered,
+                        'trial_remaining': trial_remaining,
+                        'purchased_remaining': max(purchased_remaining, 0)
+                    }
+
+                if covered:
+                    cursor.execute('UPDATE verdict_leases SET remaining = remaining - ? WHERE id = ?',
+                                   (covered, lease_id))
+
+                trial_taken = min(requested, trial_remaining)
+                purchased_taken = requested - trial_taken
+
+                cursor.executemany(
+                    'INSERT INTO verdict_usage (user_email, case_id, verdict_type, case_metadata) VALUES (?, ?, ?, ?)',
+                    [(user_email, case['case_id'], 'trial' if index < trial_taken else 'purchased',
+                      json.dumps(case['case_metadata']) if case.get('case_metadata') else None)
+                     for index, case in enumerate(cases)]
+                )
+                cursor.execute(
+                    'UPDATE user_verdict_balances SET trial_remaining = ?, purchased_remaining = ?, leased = ? '
+                    'WHERE email = ?',
+                    (trial_remaining - trial_taken, purchased_remaining - purchased_taken,
+                     leased - covered, user_email)
+                )
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+
+        return {
+            'success': True,
+            'recorded': requested,
+            'lease_covered': covered,
+            'trial_used': trial_taken,
+            'purchased_used': purchased_taken,
+            'trial_remaining': trial_remaining - trial_taken,
+            'purchased_remaining': purchased_remaining - purchased_taken,
+            'total_remaining': trial_remaining + purchased_remaining - requested - (leased - covered)
+        }
+
+    def reserve(self, user_email: str, count: int, ttl_seconds: int,
+                max_overdraft: int = 0) -> Dict[str, Any]:
+        """Lease up to count verdicts, at most max_overdraft beyond the unleased balance"""
+        now = time.time()
+        with self._lock:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                row = cursor.execute(
+                    'SELECT trial_remaining, purchased_remaining FROM user_verdict_balances WHERE email = ?',
+                    (user_email,)
+                ).fetchone()
+                if row is None:
+                    cursor.execute('ROLLBACK')
+                    return {'success': False, 'error': 'User not found'}
+
+                # Reclaim leases whose holder never recorded or released them
+                cursor.execute('DELETE FROM verdict_leases WHERE user_email = ? AND expires_at <= ?',
+                               (user_email, now))
+                leased = cursor.execute(
+                    'SELECT COALESCE(SUM(remaining), 0) FROM verdict_leases WHERE user_email = ?',
+                    (user_email,)
+                ).fetchone()[0]
+
+                available = row[0] + row[1] - leased
+                granted = max(min(count, available + max_overdraft), 0)
+                lease_id = None
+                if granted:
+                    lease_id = cursor.execute(
+                        'INSERT INTO verdict_leases (user_email, remaining, expires_at) VALUES (?, ?, ?)',
+                        (user_email, granted, now + ttl_seconds)
+                    ).lastrowid
+                cursor.execute('UPDATE user_verdict_balances SET leased = ? WHERE email = ?',
+                               (leased + granted, user_email))
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+
+        return {
+            'success': True,
+            'lease_id': lease_id,
+            'granted': granted,
+            'total_remaining': max(available - granted, 0)
+        }
+
+    def release(self, user_email: str, lease_id: int) -> Dict[str, Any]:
+        """Return a lease's unrecorded verdicts to the balance"""
+        with self._lock:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                row = cursor.execute('SELECT remaining FROM verdict_leases WHERE id = ? AND user_email = ?',
+                                     (lease_id, user_email)).fetchone()
+                released = row[0] if row else 0
+                if row:
+                    cursor.execute('DELETE FROM verdict_leases WHERE id = ?', (lease_id,))
+                    cursor.execute('UPDATE user_verdict_balances SET leased = leased - ? WHERE email = ?',
+                                   (released, user_email))
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+
+        return {'success': True, 'released': released}
+
+
+def normalize_case(case: Case) -> Dict[str, Any]:
+    """Reduce a case to the {'case_id', 'case_metadata'} shape the RPC expects"""
+    if isinstance(case, str):
+        return {'case_id': case}
+
+    normalized = {'case_id': str(case.get('case_id', 'UNKNOWN'))}
+    if case.get('case_metadata'):
+        normalized['case_metadata'] = case['case_metadata']
+    return normalized
@@ -3,15 +3,25 @@
 """
 TheGAVL Prediction API - Serverless Function
 Deployed at https://thegavl.com/api/predict
+
+Response encoding is negotiated per request:
+    format=msgpack (or Accept: application/msgpack)  MessagePack instead of JSON
+    layout=columnar                                  batch results as one list per field
+    fields=case_id,predicted_outcome,...             only these result fields
+    precision=N                                      round probabilities/confidences
+Bodies over 1 KB are gzip/brotli-compressed when Accept-Encoding allows.
 """
 
 import json
-import pickle
 import time
 import os
-from pathlib import Path
-from typing import Dict, Any
-from http.server import BaseHTTPRequestHandler
+import sys
+import threading
+from typing import Dict, Any, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _runtime import JSONHandler, RequestError, Route, dumps, optional_module
 
 # Model weights for ensemble
 MODEL_WEIGHTS = {
@@ -22,55 +32,260 @@ MODEL_WEIGHTS = {
     'citation': 0.15
 }
 
-class handler(BaseHTTPRequestHandler):
+# Largest batch accepted in one request (a Firm package)
+MAX_BATCH_CASES = 125
+
+# Fields of a single prediction, in response order (for fields= and layout=columnar)
+RESULT_FIELDS = (
+    'case_id', 'case_name', 'predicted_outcome', 'probability', 'confidence',
+    'model_predictions', 'reasoning', 'request_id'
+)
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+# Verdict balance gate (off unless one of the first two is set). The user is
+# the email in the Supabase access token (Authorization: Bearer, see _auth.py).
+# VERDICT_GATE=1            - charge predictions against Supabase balances
+# VERDICT_GATE_SQLITE=path  - charge against a local SQLite store instead
+# VERDICT_LEASE_SIZE        - verdicts reserved per store call (default 10)
+# VERDICT_LEASE_TTL         - seconds a reservation is held (default 30)
+# VERDICT_MAX_OVERDRAFT     - verdicts a user may go below zero across all instances (default 0)
+# VERDICT_GATE_STATS=1      - serve gate statistics on GET
+VERDICT_GATE_SQLITE = os.environ.get('VERDICT_GATE_SQLITE', '')
+VERDICT_GATE = os.environ.get('VERDICT_GATE') == '1' or bool(VERDICT_GATE_SQLITE)
+VERDICT_LEASE_SIZE = int(os.environ.get('VERDICT_LEASE_SIZE', '10'))
+VERDICT_LEASE_TTL = float(os.environ.get('VERDICT_LEASE_TTL', '30'))
+VERDICT_MAX_OVERDRAFT = int(os.environ.get('VERDICT_MAX_OVERDRAFT', '0'))
+VERDICT_GATE_STATS = os.environ.get('VERDICT_GATE_STATS') == '1'
+
+_balance_cache = None
+_balance_cache_lock = threading.Lock()
+
+def get_balance_cache():
+    """Balance cache for this process, created on the first gated request"""
+    global _balance_cache
+    if _balance_cache is None:
+        with _balance_cache_lock:
+            if _balance_cache is None:
+                from _balance_cache import BalanceCache
+                from _verdict_store import SupabaseVerdictStore, SQLiteVerdictStore
+
+                if VERDICT_GATE_SQLITE:
+                    store = SQLiteVerdictStore(VERDICT_GATE_SQLITE)
+                else:
+                    store = SupabaseVerdictStore()
+                _balance_cache = BalanceCache(store, lease_size=VERDICT_LEASE_SIZE,
+                                              lease_ttl=VERDICT_LEASE_TTL,
+                                              max_overdraft=VERDICT_MAX_OVERDRAFT)
+    return _balance_cache
+
+class handler(JSONHandler):
     """Serverless function handler for Vercel"""
 
-    def do_OPTIONS(self):
-        """Handle CORS preflight"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+    route = Route('GET, POST, OPTIONS', max_body_bytes=1024 * 1024,
+                  allow_headers='Content-Type, Authorization')
+    prediction_headers = {
+        'json': route.json_headers + b'Vary: Accept\r\n',
+        'msgpack': b'Content-Type: application/msgpack\r\n' + route.cors_headers + b'Vary: Accept\r\n',
+    }
+
+    def do_GET(self):
+        """Verdict gate statistics (lease hit rate, reconciliation lag) when VERDICT_GATE_STATS=1"""
+        if not VERDICT_GATE_STATS:
+            self.send_json_response(404, {'error': 'Not found'})
+            return
+
+        stats = {'verdict_gate': VERDICT_GATE}
+        if VERDICT_GATE:
+            stats.update(get_balance_cache().stats())
+        self.send_json_response(200, stats)
 
     def do_POST(self):
         """Handle prediction request"""
+        user_email = None
+        charged = []
         try:
             # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length)
-            case_data = json.loads(body)
-
-            # Make prediction
+            case_data = self.read_json()
+            is_batch = isinstance(case_data.get('cases'), list)
+            if is_batch:
+                check_batch(case_data['cases'])
+            options = response_options(self.path, self.headers.get('Accept', ''))
+
+            if VERDICT_GATE:
+                from _auth import authenticated_email
+                user_email = authenticated_email(self.headers)
+
+                cases = case_data['cases'] if is_batch else [case_data]
+                charged = [{'case_id': str(case.get('case_id', 'UNKNOWN'))} for case in cases]
+                balance = get_balance_cache().consume(user_email, charged)
+                if balance.get('unavailable'):
+                    charged = []
+                    self.send_json_response(503, {
+                        'error': 'Verdict balance unavailable',
+                        'message': 'Please retry shortly'
+                    })
+                    return
+                if not balance['allowed']:
+                    charged = []
+                    self.send_json_response(402, {
+                        'error': 'Insufficient verdicts',
+                        'message': 'Purchase more verdicts to continue',
+                        'verdicts_remaining': balance['verdicts_remaining']
+                    })
+                    return
+
+            # Make prediction (a {'cases': [...]} body is a batch)
             start_time = time.time()
-            prediction_result = predict_case(case_data)
+            if is_batch:
+                prediction_result = predict_batch(case_data['cases'])
+            else:
+                prediction_result = predict_case(case_data)
             processing_time = (time.time() - start_time) * 1000
 
+            if charged:
+                prediction_result['verdicts_remaining'] = balance['verdicts_remaining']
+
             # Add processing time
             prediction_result['processing_time_ms'] = processing_time
             prediction_result['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
 
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+            # Send response in the negotiated encoding
+            self.send_compressible(200, encode_response(shape_response(prediction_result, options), options),
+                                   self.prediction_headers[options['format']])
 
-            response = json.dumps(prediction_result)
-            self.wfile.write(response.encode())
+        except RequestError as e:
+            if charged:
+                get_balance_cache().refund(user_email, charged)
+            self.send_json_response(e.status, {
+                'error': str(e),
+                'message': 'Invalid prediction request'
+            })
 
         except Exception as e:
+            if charged:
+                get_balance_cache().refund(user_email, charged)
             # Error response
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-
-            error_response = json.dumps({
+            self.send_json_response(500, {
                 'error': str(e),
                 'message': 'Prediction failed'
             })
-            self.wfile.write(error_response.encode())
+
+def response_options(path: str, accept: str) -> Dict[str, Any]:
+    """
+    Response encoding requested by the query string and Accept header
+
+    Returns:
+        Dict with format ('json' or 'msgpack'), layout ('rows' or 'columnar'),
+        fields (tuple or None) and precision (int or None)
+    """
+    query = parse_qs(urlsplit(path).query)
+
+    def param(name: str) -> Optional[str]:
+        values = query.get(name)
+        return values[-1] if values else None
+
+    response_format = param('format')
+    if response_format is None:
+        # Accept-based negotiation falls back to JSON when msgpack is not installed
+        wants_msgpack = any(media_type in accept for media_type in MSGPACK_TYPES)
+        response_format = 'msgpack' if wants_msgpack and optional_module('msgpack') else 'json'
+    elif response_format not in ('json', 'msgpack'):
+        raise RequestError(400, f'Unknown format: {response_format}')
+    elif response_format == 'msgpack' and optional_module('msgpack') is None:
+        raise RequestError(406, 'MessagePack encoding is not available')
+
+    layout = param('layout') or 'rows'
+    if layout not in ('rows', 'columnar'):
+        raise RequestError(400, f'Unknown layout: {layout}')
+
+    fields = None
+    if param('fields') is not None:
+        fields = tuple(field.strip() for field in param('fields').split(',') if field.strip())
+        unknown = [field for field in fields if field not in RESULT_FIELDS]
+        if unknown:
+            raise RequestError(400, f'Unknown fields: {", ".join(unknown)}')
+
+    precision = None
+    if param('precision') is not None:
+        try:
+            precision = int(param('precision'))
+        except ValueError:
+            precision = -1
+        if not 0 <= precision <= 15:
+            raise RequestError(400, 'precision must be an integer from 0 to 15')
+
+    return {
+        'format': response_format,
+        'layout': layout,
+        'fields': fields,
+        'precision': precision
+    }
+
+def shape_response(response: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply fields=, precision= and layout= to a single or batch prediction response"""
+    fields, precision = options['fields'], options['precision']
+
+    def shape(prediction: Dict[str, Any]) -> Dict[str, Any]:
+        if fields is not None:
+            prediction = {field: prediction[field] for field in fields if field in prediction}
+        if precision is not None:
+            prediction = round_prediction(prediction, precision)
+        return prediction
+
+    if 'results' not in response:
+        # Single prediction: its fields sit beside processing_time_ms and timestamp
+        envelope = {key: value for key, value in response.items() if key not in RESULT_FIELDS}
+        return dict(shape(response), **envelope)
+
+    results = [shape(prediction) for prediction in response['results']]
+    shaped = {key: value for key, value in response.items() if key != 'results'}
+    if options['layout'] == 'columnar':
+        shaped['layout'] = 'columnar'
+        shaped['columns'] = to_columnar(results, fields or RESULT_FIELDS)
+    else:
+        shaped['results'] = results
+    return shaped
+
+def round_prediction(prediction: Dict[str, Any], digits: int) -> Dict[str, Any]:
+    """Copy of prediction with probabilities and confidences rounded"""
+    rounded = dict(prediction)
+    for key in ('probability', 'confidence'):
+        if key in rounded:
+            rounded[key] = round(rounded[key], digits)
+    if 'model_predictions' in rounded:
+        rounded['model_predictions'] = [
+            dict(model, probability=round(model['probability'], digits),
+                 confidence=round(model['confidence'], digits))
+            for model in rounded['model_predictions']
+        ]
+    return rounded
+
+def to_columnar(results: List[Dict[str, Any]], fields: tuple) -> Dict[str, Any]:
+    """
+    One list per field instead of one dict per case
+
+    model_predictions becomes model_names (listed once; every case uses the
+    same models in the same order) plus per-case lists of model outcomes,
+    probabilities and confidences.
+    """
+    columns: Dict[str, Any] = {}
+    for field in fields:
+        if field != 'model_predictions':
+            columns[field] = [prediction.get(field) for prediction in results]
+            continue
+
+        per_case = [prediction.get('model_predictions') or [] for prediction in results]
+        columns['model_names'] = [model['model_name'] for model in per_case[0]] if per_case else []
+        for key, column in (('outcome', 'model_outcomes'), ('probability', 'model_probabilities'),
+                            ('confidence', 'model_confidences')):
+            columns[column] = [[model[key] for model in models] for models in per_case]
+    return columns
+
+def encode_response(response: Dict[str, Any], options: Dict[str, Any]) -> bytes:
+    """Serialize a shaped response as JSON or MessagePack"""
+    if options['format'] == 'msgpack':
+        return optional_module('msgpack').packb(response, use_bin_type=True)
+    return dumps(response)
 
 def predict_case(case_data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -129,6 +344,28 @@ def predict_case(case_data: Dict[str, Any]) -> Dict[str, Any]:
         'request_id': f"{case_id}_{int(time.time() * 1000)}"
     }
 
+def check_batch(cases: list):
+    """Reject batches that are too large or contain anything but case objects"""
+    if len(cases) > MAX_BATCH_CASES:
+        raise RequestError(413, f'Batch exceeds {MAX_BATCH_CASES} cases')
+    if not all(isinstance(case, dict) for case in cases):
+        raise RequestError(400, 'Every case in a batch must be an object')
+
+def predict_batch(cases: list) -> Dict[str, Any]:
+    """
+    Predict every case in a batch
+
+    Returns:
+        Dict with results (one predict_case result per case) and count
+    """
+    check_batch(cases)
+
+    results = [predict_case(case) for case in cases]
+    return {
+        'results': results,
+        'count': len(results)
+    }
+
 def predict_with_model(model_name: str, case_data: Dict, opinion_text: str) -> tuple:
     """
     Generate prediction from a single model
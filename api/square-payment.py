@@ -8,20 +8,15 @@ Serverless function for Vercel deployment
 
 import json
 import os
+import sys
 import time
 import uuid
-from http.server import BaseHTTPRequestHandler
+from datetime import datetime, timedelta
 from typing import Dict, Any
 
-# Square API Configuration
-# Set these in Vercel environment variables:
-# SQUARE_ACCESS_TOKEN - Your Square access token
-# SQUARE_LOCATION_ID - Your Square location ID
-# SQUARE_ENVIRONMENT - 'sandbox' or 'production'
-
-SQUARE_ACCESS_TOKEN = os.environ.get('SQUARE_ACCESS_TOKEN', '')
-SQUARE_LOCATION_ID = os.environ.get('SQUARE_LOCATION_ID', '')
-SQUARE_ENVIRONMENT = os.environ.get('SQUARE_ENVIRONMENT', 'sandbox')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _runtime import JSONHandler, RequestError, Route
+from _square_config import SQUARE_ACCESS_TOKEN, SQUARE_ENVIRONMENT, SquareConfigService, square_request
 
 # Pricing configuration
 PACKAGES = {
@@ -46,34 +41,22 @@ PACKAGES = {
 }
 
 
-class handler(BaseHTTPRequestHandler):
+# Locations, catalog pricing and per-package intent payloads: loaded from the
+# cache file at import, refreshed from Square in the background when stale
+square_config = SquareConfigService(PACKAGES)
+square_config.warm()
+
+
+class handler(JSONHandler):
     """Serverless function handler for Square payments"""
 
-    def send_json_response(self, status_code: int, data: Dict[str, Any]):
-        """Send JSON response with CORS headers"""
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
-
-    def do_OPTIONS(self):
-        """Handle CORS preflight"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+    route = Route('POST, OPTIONS', max_body_bytes=64 * 1024)
 
     def do_POST(self):
         """Handle payment processing"""
         try:
             # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length)
-            request_data = json.loads(body)
+            request_data = self.read_json()
 
             action = request_data.get('action', 'process_payment')
 
@@ -98,6 +81,12 @@ class handler(BaseHTTPRequestHandler):
                     'error': f'Unknown action: {action}'
                 })
 
+        except RequestError as e:
+            self.send_json_response(e.status, {
+                'success': False,
+                'error': str(e)
+            })
+
         except Exception as e:
             self.send_json_response(500, {
                 'success': False,
@@ -108,40 +97,21 @@ class handler(BaseHTTPRequestHandler):
     def create_payment_intent(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a payment intent for the specified package"""
         try:
-            package_type = data.get('package')
-            user_email = data.get('email')
-            user_name = data.get('name')
-
-            if not package_type or package_type not in PACKAGES:
+            # Precomputed payload plus a unique idempotency key; no Square call
+            intent = square_config.payment_intent(
+                data.get('package'),
+                idempotency_key=str(uuid.uuid4()),
+                user_email=data.get('email'),
+                user_name=data.get('name')
+            )
+
+            if intent is None:
                 return {
                     'success': False,
                     'error': 'Invalid package type'
                 }
 
-            package_info = PACKAGES[package_type]
-
-            # Generate unique idempotency key
-            idempotency_key = str(uuid.uuid4())
-
-            return {
-                'success': True,
-                'payment_intent': {
-                    'idempotency_key': idempotency_key,
-                    'package': package_type,
-                    'package_name': package_info['name'],
-                    'amount': package_info['amount'],
-                    'verdicts': package_info['verdicts'],
-                    'validity_days': package_info['validity_days'],
-                    'currency': 'USD',
-                    'user_email': user_email,
-                    'user_name': user_name
-                },
-                'square_config': {
-                    'application_id': self.get_square_application_id(),
-                    'location_id': SQUARE_LOCATION_ID,
-                    'environment': SQUARE_ENVIRONMENT
-                }
-            }
+            return intent
 
         except Exception as e:
             return {
@@ -165,12 +135,8 @@ class handler(BaseHTTPRequestHandler):
                     'error': 'Missing required payment information'
                 }
 
-            package_info = PACKAGES.get(package_type)
-            if not package_info:
-                return {
-                    'success': False,
-                    'error': 'Invalid package type'
-                }
+            # The price the signed payment intent quoted, not today's price
+            package_info = square_config.quoted_package(data)
 
             # In production, this would call Square's Payments API
             if SQUARE_ACCESS_TOKEN and SQUARE_ENVIRONMENT == 'production':
@@ -178,8 +144,8 @@ class handler(BaseHTTPRequestHandler):
                     source_id=source_id,
                     idempotency_key=idempotency_key,
                     amount=package_info['amount'],
-                    currency='USD',
-                    note=f"{package_info['name']} - {user_email}"
+                    currency=package_info['currency'],
+                    note=f"{package_info['package_name']} - {user_email}"
                 )
             else:
                 # Demo mode - simulate successful payment
@@ -206,6 +172,8 @@ class handler(BaseHTTPRequestHandler):
                 return {
                     'success': True,
                     'payment_id': payment_result['payment_id'],
+                    'amount': package_info['amount'],
+                    'currency': package_info['currency'],
                     'verdicts_added': package_info['verdicts'],
                     'validity_days': package_info['validity_days'],
                     'message': f'Payment successful! {package_info["verdicts"]} verdict(s) added to your account.',
@@ -217,6 +185,9 @@ class handler(BaseHTTPRequestHandler):
                     'error': payment_result.get('error', 'Payment failed')
                 }
 
+        except RequestError:
+            raise
+
         except Exception as e:
             return {
                 'success': False,
@@ -227,15 +198,11 @@ class handler(BaseHTTPRequestHandler):
                        amount: int, currency: str, note: str) -> Dict[str, Any]:
         """Call Square Payments API (production implementation)"""
         try:
-            import requests
-
-            url = f'https://connect.squareup{"sandbox" if SQUARE_ENVIRONMENT == "sandbox" else ""}.com/v2/payments'
-
-            headers = {
-                'Authorization': f'Bearer {SQUARE_ACCESS_TOKEN}',
-                'Content-Type': 'application/json',
-                'Square-Version': '2024-10-17'
-            }
+            if not square_config.location_id:
+                return {
+                    'success': False,
+                    'error': 'Square location not configured: set SQUARE_LOCATION_ID'
+                }
 
             payload = {
                 'source_id': source_id,
@@ -244,14 +211,13 @@ class handler(BaseHTTPRequestHandler):
                     'amount': amount,
                     'currency': currency
                 },
-                'location_id': SQUARE_LOCATION_ID,
+                'location_id': square_config.location_id,
                 'note': note
             }
 
-            response = requests.post(url, json=payload, headers=headers)
-            result = response.json()
+            status_code, result = square_request('POST', '/v2/payments', payload)
 
-            if response.status_code == 200:
+            if status_code == 200:
                 payment = result.get('payment', {})
                 return {
                     'success': True,
@@ -266,11 +232,6 @@ class handler(BaseHTTPRequestHandler):
                     'error': result.get('errors', [{}])[0].get('detail', 'Payment failed')
                 }
 
-        except ImportError:
-            return {
-                'success': False,
-                'error': 'Square API library not available. Install with: pip install requests'
-            }
         except Exception as e:
             return {
                 'success': False,
@@ -282,14 +243,11 @@ class handler(BaseHTTPRequestHandler):
                          payment_id: str, amount_paid: float) -> Dict[str, Any]:
         """Allocate verdicts to user's account"""
         try:
-            # Get current user data
-            import json
-
             # In production, this would update Supabase
             # For now, return allocation details that frontend can store
 
-            import datetime
-            expiration_date = datetime.datetime.now() + datetime.timedelta(days=validity_days)
+            purchase_date = datetime.now()
+            expiration_date = purchase_date + timedelta(days=validity_days)
 
             allocation = {
                 'user_email': user_email,
@@ -298,7 +256,7 @@ class handler(BaseHTTPRequestHandler):
                 'verdicts_purchased': verdicts,
                 'amount_paid': amount_paid,
                 'payment_id': payment_id,
-                'purchase_date': datetime.datetime.now().isoformat(),
+                'purchase_date': purchase_date.isoformat(),
                 'expiration_date': expiration_date.isoformat(),
                 'validity_days': validity_days,
                 'status': 'active'
@@ -352,19 +310,9 @@ class handler(BaseHTTPRequestHandler):
     def query_square_payment(self, payment_id: str) -> Dict[str, Any]:
         """Query Square for payment status"""
         try:
-            import requests
+            status_code, result = square_request('GET', f'/v2/payments/{payment_id}')
 
-            url = f'https://connect.squareup{"sandbox" if SQUARE_ENVIRONMENT == "sandbox" else ""}.com/v2/payments/{payment_id}'
-
-            headers = {
-                'Authorization': f'Bearer {SQUARE_ACCESS_TOKEN}',
-                'Square-Version': '2024-10-17'
-            }
-
-            response = requests.get(url, headers=headers)
-            result = response.json()
-
-            if response.status_code == 200:
+            if status_code == 200:
                 payment = result.get('payment', {})
                 return {
                     'success': True,
@@ -383,14 +331,6 @@ class handler(BaseHTTPRequestHandler):
                 'error': f'Query error: {str(e)}'
             }
 
-    def get_square_application_id(self) -> str:
-        """Get Square Application ID based on environment"""
-        # You need to set this based on your Square application
-        if SQUARE_ENVIRONMENT == 'sandbox':
-            return os.environ.get('SQUARE_APPLICATION_ID_SANDBOX', 'sandbox-sq0idb-XXXXXX')
-        else:
-            return os.environ.get('SQUARE_APPLICATION_ID', 'sq0idp-XXXXXX')
-
 
 # For local testing
 if __name__ == '__main__':
@@ -410,3 +350,4 @@ if __name__ == '__main__':
     # This would be handled by the handler in production
     print("\nNote: This is the serverless function. Deploy to Vercel to use.")
     print("Set environment variables: SQUARE_ACCESS_TOKEN, SQUARE_LOCATION_ID, SQUARE_ENVIRONMENT")
+    print("\nSquare configuration:", json.dumps(square_config.status(), indent=2))
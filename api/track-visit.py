@@ -6,13 +6,16 @@ Visit Counter API for TheGAVL
 Tracks page visits, unique visitors, and generates analytics
 """
 
-import json
+import os
+import sys
 import time
-from http.server import BaseHTTPRequestHandler
 from datetime import datetime
 from collections import defaultdict
 import hashlib
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _runtime import JSONHandler, RequestError, Route
+
 # In-memory storage (for production, use Redis or database)
 VISIT_DATA = defaultdict(int)
 UNIQUE_VISITORS = set()
@@ -20,37 +23,20 @@ PAGE_VIEWS = defaultdict(int)
 DAILY_STATS = defaultdict(lambda: defaultdict(int))
 
 
-class handler(BaseHTTPRequestHandler):
+class handler(JSONHandler):
     """Serverless function handler for visit tracking"""
 
-    def send_json_response(self, status_code: int, data: dict):
-        """Send JSON response with CORS headers"""
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
-
-    def do_OPTIONS(self):
-        """Handle CORS preflight"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+    route = Route('POST, GET, OPTIONS', max_body_bytes=16 * 1024)
 
     def do_POST(self):
         """Track a visit"""
         try:
             # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length)
-            visit_data = json.loads(body)
+            visit_data = self.read_json()
 
             # Extract visit information
-            page = visit_data.get('page', 'unknown')
+            page = visit_data.get('page')
+            page = 'unknown' if page is None else str(page)  # 7 and '7' are one page
             url = visit_data.get('url', '')
             timestamp = visit_data.get('timestamp', datetime.now().isoformat())
             referrer = visit_data.get('referrer', 'direct')
@@ -83,6 +69,12 @@ class handler(BaseHTTPRequestHandler):
                 }
             })
 
+        except RequestError as e:
+            self.send_json_response(e.status, {
+                'success': False,
+                'error': str(e)
+            })
+
         except Exception as e:
             self.send_json_response(500, {
                 'success': False,
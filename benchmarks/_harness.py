@@ -0,0 +1,86 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Helpers for driving the api/ handlers in-process from benchmark scripts.
+"""
+
+import importlib.util
+import io
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+API_DIR = REPO_ROOT / 'api'
+
+HANDLERS = ('predict', 'track-visit', 'square-payment')
+
+
+def load_api_module(name: str) -> ModuleType:
+    """Import api/<name>.py (handler file names contain hyphens)"""
+    module_name = 'gavl_api_' + name.replace('-', '_')
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, API_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeSocket:
+    """Just enough of a socket for StreamRequestHandler; counts writes"""
+
+    def __init__(self, raw_request: bytes):
+        self.raw_request = raw_request
+        self.sent = bytearray()
+        self.writes = 0
+
+    def makefile(self, mode: str, buffering: int = -1):
+        return io.BytesIO(self.raw_request)
+
+    def sendall(self, data: bytes):
+        self.writes += 1
+        self.sent += data
+
+    def setsockopt(self, *args):
+        pass
+
+
+class NullWriter(io.TextIOBase):
+    """Discards access-log lines written to stderr during timing loops"""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def build_request(method: str, path: str, body: bytes = b'',
+                  headers: Optional[Dict[str, str]] = None) -> bytes:
+    """Serialize an HTTP/1.1 request"""
+    lines = [f'{method} {path} HTTP/1.1', 'Host: localhost']
+    for key, value in (headers or {}).items():
+        lines.append(f'{key}: {value}')
+    if body or method == 'POST':
+        lines.append(f'Content-Length: {len(body)}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+def invoke(handler_cls, raw_request: bytes) -> Tuple[bytes, int]:
+    """Run one request through a handler class; returns (response bytes, write calls)"""
+    sock = FakeSocket(raw_request)
+    handler_cls(sock, ('127.0.0.1', 0), None)
+    return bytes(sock.sent), sock.writes
+
+
+def split_response(response: bytes) -> Tuple[int, Dict[str, str], bytes]:
+    """Parse a raw HTTP response into (status, headers, body)"""
+    head, _, body = response.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        key, _, value = line.partition(':')
+        headers[key.strip().lower()] = value.strip()
+    return status, headers, body
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Verdict Balance Gate Benchmark
+Charges predictions against a SQLite verdict store two ways:
+  sync    - one record_usage call per prediction (a DB round trip on every request)
+  cached  - api/_balance_cache.py: leased verdicts, queued usage, bulk reconciliation
+--store-latency-ms adds a delay to every store call to stand in for the
+Supabase round trip.
+
+Then runs --instances caches against one shared store, all spending the same
+balance and reconciling after every round, and checks that the instances
+together served and recorded no more than the balance plus the overdraft.
+
+    python3 benchmarks/balance_gate.py --requests 2000 --store-latency-ms 20
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, Any
+
+from _harness import API_DIR
+
+sys.path.insert(0, str(API_DIR))
+from _balance_cache import BalanceCache
+from _verdict_store import SQLiteVerdictStore
+
+USER = 'bench@test.local'
+
+
+class SlowStore:
+    """Wraps a store, adding a fixed delay to every call"""
+
+    def __init__(self, store, latency_ms: float):
+        self.store = store
+        self.latency = latency_ms / 1000
+
+    def __getattr__(self, name):
+        method = getattr(self.store, name)
+
+        def call(*args, **kwargs):
+            time.sleep(self.latency)
+            return method(*args, **kwargs)
+        return call
+
+
+def measure_sync(store, requests: int) -> Dict[str, Any]:
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        store.record_usage(USER, f'SYNC-{i}')
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def measure_cached(store, requests: int, lease_size: int) -> Dict[str, Any]:
+    cache = BalanceCache(store, lease_size=lease_size)
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        cache.consume(USER, [{'case_id': f'CACHED-{i}'}])
+        latencies.append(time.perf_counter() - start)
+    cache.close()
+    return dict(summarize(latencies), gate=cache.stats())
+
+
+def summarize(latencies) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'mean_us': round(sum(latencies) / len(latencies) * 1e6, 1),
+        'p50_us': round(latencies[len(latencies) // 2] * 1e6, 1),
+        'p99_us': round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+    }
+
+
+def check_overdraft(instances: int, balance: int, overdraft: int, lease_size: int,
+                    latency_ms: float) -> Dict[str, Any]:
+    """Spend one balance from several caches, reconciling each round, until every one refuses"""
+    store = SlowStore(SQLiteVerdictStore(), latency_ms)
+    store.set_balance(USER, trial=0, purchased=balance)
+    caches = [BalanceCache(store, lease_size=lease_size, max_overdraft=overdraft) for _ in range(instances)]
+
+    served = [0] * instances
+    active = set(range(instances))
+    attempt = 0
+    while active:
+        for index in list(active):
+            attempt += 1
+            if caches[index].consume(USER, [{'case_id': f'OD-{attempt}'}])['allowed']:
+                served[index] += 1
+            else:
+                active.discard(index)
+        for cache in caches:
+            cache.flush()
+    for cache in caches:
+        cache.close()
+    recorded = store.store.connection.execute(
+        'SELECT COUNT(*) FROM verdict_usage WHERE user_email = ?', (USER,)).fetchone()[0]
+
+    return {
+        'instances': instances,
+        'balance': balance,
+        'max_overdraft': overdraft,
+        'served_per_instance': served,
+        'served_total': sum(served),
+        'recorded': recorded,
+        'within_limit': sum(served) <= balance + overdraft and recorded <= balance + overdraft,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the cached verdict balance gate')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--store-latency-ms', type=float, default=0.0)
+    parser.add_argument('--lease-size', type=int, default=10)
+    parser.add_argument('--instances', type=int, default=3)
+    parser.add_argument('--overdraft', type=int, default=2)
+    args = parser.parse_args()
+
+    sync_store = SlowStore(SQLiteVerdictStore(), args.store_latency_ms)
+    sync_store.set_balance(USER, trial=0, purchased=args.requests)
+    cached_store = SlowStore(SQLiteVerdictStore(), args.store_latency_ms)
+    cached_store.set_balance(USER, trial=0, purchased=args.requests)
+
+    results = {
+        'store_latency_ms': args.store_latency_ms,
+        'sync': measure_sync(sync_store, args.requests),
+        'cached': measure_cached(cached_store, args.requests, args.lease_size),
+        'overdraft': check_overdraft(args.instances, 50, args.overdraft, args.lease_size, args.store_latency_ms),
+    }
+
+    print("=" * 64)
+    print(f"Verdict gate ({args.requests:,} requests, store latency {args.store_latency_ms} ms)")
+    print("=" * 64)
+    for variant in ('sync', 'cached'):
+        stats = results[variant]
+        print(f"  {variant:<7} mean {stats['mean_us']:>9.1f} us   p50 {stats['p50_us']:>9.1f} us"
+              f"   p99 {stats['p99_us']:>9.1f} us")
+    gate = results['cached']['gate']
+    print(f"  lease hit rate {gate['hit_rate']:.2%}, max reconciliation lag {gate['max_reconcile_lag_s']} s")
+    overdraft = results['overdraft']
+    print(f"  {overdraft['instances']} instances on a balance of {overdraft['balance']}"
+          f" (overdraft {overdraft['max_overdraft']}):"
+          f" served {overdraft['served_total']} {overdraft['served_per_instance']}, recorded {overdraft['recorded']}"
+          f" ({'within' if overdraft['within_limit'] else 'OVER'} limit)")
+    print()
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if overdraft['within_limit'] else 1)
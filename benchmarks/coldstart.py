@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Cold-Start Profiler for the api/ functions
+Starts a fresh interpreter per handler under `python -X importtime`, then
+records how long the handler module takes to import (with a per-module
+breakdown), how long its first request takes (including any imports it
+triggers lazily) and how long a warm request takes.
+
+    python3 benchmarks/coldstart.py --report coldstart.json
+    python3 benchmarks/coldstart.py --budget benchmarks/coldstart_budget.json   # exits 1 if over
+
+Medians over --runs fresh processes are reported. Deployed functions can log
+the same first-request numbers with GAVL_COLDSTART_LOG=1 (see api/_runtime.py).
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+from _harness import HANDLERS
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BUDGET = BENCH_DIR / 'coldstart_budget.json'
+
+FIXTURES = {
+    'predict': {
+        'case_id': 'COLD-001',
+        'case_name': 'Cold v. Start',
+        'issue_area': 'constitutional',
+        'opinion_text': 'Strong evidence and clear facts support the petitioner.'
+    },
+    'track-visit': {'page': 'index', 'url': 'https://thegavl.com/', 'referrer': 'direct'},
+    'square-payment': {'action': 'create_payment', 'package': 'single',
+                       'email': 'cold@test.local', 'name': 'Cold Start'},
+}
+
+IMPORT_START = '@@import-start'
+IMPORT_END = '@@import-end'
+REQUEST_START = '@@request-start'
+REQUEST_END = '@@request-end'
+
+# Runs inside the fresh interpreter; markers split -X importtime output by phase
+CHILD = f"""
+import sys, time, json
+sys.path.insert(0, {str(BENCH_DIR)!r})
+from _harness import load_api_module, invoke, build_request, NullWriter
+from contextlib import redirect_stdout
+import http.server  # already imported by the platform's Python bootstrap
+
+name, body = sys.argv[1], sys.argv[2].encode()
+request = build_request('POST', '/api/' + name, body, {{'Content-Type': 'application/json'}})
+
+sys.stderr.write({IMPORT_START!r} + '\\n')
+t0 = time.perf_counter()
+module = load_api_module(name)
+t1 = time.perf_counter()
+sys.stderr.write({IMPORT_END!r} + '\\n' + {REQUEST_START!r} + '\\n')
+with redirect_stdout(NullWriter()):
+    response, _ = invoke(module.handler, request)
+    t2 = time.perf_counter()
+    sys.stderr.write({REQUEST_END!r} + '\\n')
+    invoke(module.handler, request)
+    t3 = time.perf_counter()
+
+print(json.dumps({{
+    'import_ms': (t1 - t0) * 1000,
+    'first_request_ms': (t2 - t1) * 1000,
+    'warm_request_ms': (t3 - t2) * 1000,
+    'status': int(response.split(b' ', 2)[1]),
+}}))
+"""
+
+
+def parse_importtime(stderr: str, start: str, end: str) -> List[Dict[str, Any]]:
+    """Modules imported between two markers, from -X importtime output"""
+    modules = []
+    active = False
+    for line in stderr.splitlines():
+        if line == start:
+            active = True
+        elif line == end:
+            break
+        elif active and line.startswith('import time:') and '|' in line:
+            fields = line[len('import time:'):].split('|')
+            try:
+                self_us, cumulative_us = int(fields[0]), int(fields[1])
+            except ValueError:
+                continue  # header line
+            name = fields[2].rstrip()
+            modules.append({
+                'module': name.strip(),
+                'depth': (len(name) - len(name.lstrip())) // 2,
+                'self_ms': self_us / 1000,
+                'cumulative_ms': cumulative_us / 1000,
+            })
+    return modules
+
+
+def profile_once(name: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD, name, json.dumps(FIXTURES[name])],
+        capture_output=True, text=True, cwd=BENCH_DIR
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f'{name} cold start failed:\n{proc.stderr[-2000:]}')
+
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    timings['process_wall_ms'] = wall_ms
+    return (timings,
+            parse_importtime(proc.stderr, IMPORT_START, IMPORT_END),
+            parse_importtime(proc.stderr, REQUEST_START, REQUEST_END))
+
+
+def profile_handler(name: str, runs: int, top: int) -> Dict[str, Any]:
+    """Median cold-start timings over `runs` fresh interpreters"""
+    samples, import_runs, lazy_runs = [], [], []
+    for _ in range(runs):
+        timings, imported, lazy = profile_once(name)
+        samples.append(timings)
+        import_runs.append(imported)
+        lazy_runs.append(lazy)
+
+    def median(key: str) -> float:
+        return round(statistics.median(sample[key] for sample in samples), 3)
+
+    # Per-module medians across runs, top-level imports ranked by cumulative time
+    per_module: Dict[str, List[Dict[str, Any]]] = {}
+    for imported in import_runs:
+        for entry in imported:
+            per_module.setdefault(entry['module'], []).append(entry)
+    modules = [{
+        'module': module,
+        'depth': entries[0]['depth'],
+        'self_ms': round(statistics.median(e['self_ms'] for e in entries), 3),
+        'cumulative_ms': round(statistics.median(e['cumulative_ms'] for e in entries), 3),
+    } for module, entries in per_module.items()]
+    modules.sort(key=lambda m: -m['cumulative_ms'])
+
+    return {
+        'import_ms': median('import_ms'),
+        'first_request_ms': median('first_request_ms'),
+        'warm_request_ms': median('warm_request_ms'),
+        'process_wall_ms': median('process_wall_ms'),
+        'status': samples[-1]['status'],
+        'modules_imported': len(modules),
+        'top_modules': modules[:top],
+        'lazy_imports_on_first_request': sorted({e['module'] for lazy in lazy_runs for e in lazy}),
+    }
+
+
+def check_budget(results: Dict[str, Any], budget: Dict[str, Any]) -> List[str]:
+    """Human-readable budget violations (empty when everything is within budget)"""
+    violations = []
+    for name, stats in results.items():
+        limits = dict(budget.get('default', {}), **budget.get('handlers', {}).get(name, {}))
+        for metric, limit in limits.items():
+            if metric in stats and stats[metric] > limit:
+                violations.append(f'{name}: {metric} {stats[metric]:.1f} ms exceeds budget {limit} ms')
+    return violations
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profile api/ handler cold starts')
+    parser.add_argument('--handlers', nargs='+', choices=HANDLERS, default=list(HANDLERS))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Modules to list per handler')
+    parser.add_argument('--budget', default=str(DEFAULT_BUDGET), help='Budget JSON file')
+    parser.add_argument('--no-budget', action='store_true')
+    parser.add_argument('--report', help='Write the JSON report here')
+    args = parser.parse_args()
+
+    results = {name: profile_handler(name, args.runs, args.top) for name in args.handlers}
+    report = {
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'handlers': results,
+    }
+
+    print("=" * 72)
+    print(f"Cold start (median of {args.runs} fresh processes, Python {report['python']})")
+    print("=" * 72)
+    for name, stats in results.items():
+        print(f"  {name:<16} import {stats['import_ms']:>7.1f} ms   first request"
+              f" {stats['first_request_ms']:>6.1f} ms   warm {stats['warm_request_ms']:>5.2f} ms")
+        for module in stats['top_modules'][:5]:
+            print(f"      {module['cumulative_ms']:>7.2f} ms  {module['module']}")
+        if stats['lazy_imports_on_first_request']:
+            print(f"      lazily imported on first request: {', '.join(stats['lazy_imports_on_first_request'])}")
+
+    exit_code = 0
+    if not args.no_budget:
+        with open(args.budget) as budget_file:
+            budget = json.load(budget_file)
+        report['budget'] = budget
+        report['violations'] = check_budget(results, budget)
+        if report['violations']:
+            print("\nBudget exceeded:")
+            for violation in report['violations']:
+                print(f"  {violation}")
+            exit_code = 1
+        else:
+            print("\nAll handlers within cold-start budget")
+
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"Report written to {args.report}")
+
+    sys.exit(exit_code)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Handler Overhead Benchmark
+Measures per-request overhead of an empty handler written the old way
+(send_response + send_header per header + json.dumps().encode()) against
+one built on api/_runtime.py. Neither does any work besides echoing {}.
+
+    python3 benchmarks/handler_overhead.py --iterations 20000
+"""
+
+import argparse
+import json
+import sys
+import time
+from contextlib import redirect_stderr
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, Any
+
+from _harness import API_DIR, NullWriter, build_request, invoke
+
+sys.path.insert(0, str(API_DIR))
+from _runtime import JSON_CODEC, JSONHandler, Route
+
+
+class LegacyEmptyHandler(BaseHTTPRequestHandler):
+    """Empty handler using the pre-runtime response pattern"""
+
+    def do_POST(self):
+        content_length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(content_length)
+        data = json.loads(body)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+        self.wfile.write(json.dumps(data).encode())
+
+
+class RuntimeEmptyHandler(JSONHandler):
+    """Empty handler using the shared runtime"""
+
+    route = Route('POST, OPTIONS')
+
+    def do_POST(self):
+        self.send_json_response(200, self.read_json())
+
+
+def measure(handler_cls, raw_request: bytes, iterations: int) -> Dict[str, Any]:
+    """Time iterations requests through handler_cls"""
+    with redirect_stderr(NullWriter()):
+        _, writes = invoke(handler_cls, raw_request)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            invoke(handler_cls, raw_request)
+        elapsed = time.perf_counter() - start
+
+    return {
+        'iterations': iterations,
+        'us_per_request': round(elapsed / iterations * 1e6, 2),
+        'writes_per_response': writes,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure empty-handler overhead')
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    raw_request = build_request('POST', '/api/empty', b'{}',
+                                {'Content-Type': 'application/json'})
+
+    results = {
+        'json_codec': JSON_CODEC,
+        'legacy': measure(LegacyEmptyHandler, raw_request, args.iterations),
+        'runtime': measure(RuntimeEmptyHandler, raw_request, args.iterations),
+    }
+
+    print("=" * 60)
+    print(f"Empty handler overhead ({args.iterations:,} requests, codec: {JSON_CODEC})")
+    print("=" * 60)
+    for variant in ('legacy', 'runtime'):
+        stats = results[variant]
+        print(f"  {variant:<8} {stats['us_per_request']:>8.2f} us/request"
+              f"  {stats['writes_per_response']} write(s)/response")
+    print()
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Load-Testing Harness for the api/ functions
+Hosts predict, track-visit and square-payment behind one local server (with
+the Square stub standing in for Square), replays a weighted traffic mix at
+a target rate and writes a machine-readable JSON report.
+
+    # 60s at 50 req/s with the default mix, save the report
+    python3 benchmarks/loadtest.py --rate 50 --duration 60 --report run.json
+
+    # Same run later, diffed against the saved baseline
+    python3 benchmarks/loadtest.py --rate 50 --duration 60 --compare run.json
+
+    # Find per-endpoint saturation points by ramping each endpoint alone
+    python3 benchmarks/loadtest.py --saturation --slo-ms 250
+
+    # Host in one process, drive from another (keeps the GIL out of the numbers)
+    python3 benchmarks/loadtest.py --serve --port 8800
+    python3 benchmarks/loadtest.py --target http://127.0.0.1:8800 --server-pid <pid>
+
+Latency is measured from each request's scheduled send time, so queueing
+inside the harness counts against the endpoint (no coordinated omission).
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from _harness import NullWriter, load_api_module
+from square_stub import STUB_LOCATION, start_stub
+
+REPORT_VERSION = 1
+
+ROUTES = {
+    '/api/predict': 'predict',
+    '/api/track-visit': 'track-visit',
+    '/api/square-payment': 'square-payment',
+}
+
+DEFAULT_MIX = {
+    'visit': 60,
+    'predict': 20,
+    'predict_batch': 5,
+    'payment_create': 8,
+    'payment_process': 5,
+    'payment_verify': 2,
+}
+
+PAGES = ['index', 'landing', 'purchase-verdicts', 'onboarding', 'court_session', 'technology']
+
+SAMPLE_OPINION = (
+    'Overview: Contract dispute over delivery terms. Facts: The supplier missed '
+    'three delivery windows. Your Evidence: Signed contract, clear email record '
+    'and strong witness statements. Opposing Evidence: Force majeure claim. '
+    'Weaknesses: One delivery window was ambiguous.'
+)
+
+
+# ============================================================
+# Hosting
+# ============================================================
+
+class QuietHandler:
+    """Mixin that drops access log lines (one per request floods stderr under load)"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def build_router(handler_classes: Dict[str, type]) -> type:
+    """Handler class that dispatches on path to the api/ handler classes"""
+    # The router hands requests over by switching class, so the routes need the mixin too
+    quiet_classes = {path: type(cls.__name__, (QuietHandler, cls), {'__module__': cls.__module__})
+                     for path, cls in handler_classes.items()}
+
+    class RouterHandler(QuietHandler, BaseHTTPRequestHandler):
+        def dispatch(self):
+            route_cls = quiet_classes.get(urlsplit(self.path).path)
+            if route_cls is None:
+                self.send_error(404)
+                return
+            # Request is already parsed; continue as the route's handler class
+            self.__class__ = route_cls
+            method = getattr(self, 'do_' + self.command, None)
+            if method is None:
+                self.send_error(405)
+                return
+            method()
+
+        do_GET = do_POST = do_OPTIONS = dispatch
+
+    return RouterHandler
+
+
+class APIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def configure_square_stub(latency_ms: float, failure_rate: float):
+    """Start the Square stub and point square-payment.py at it (before import)"""
+    stub_server, stub_state = start_stub(latency_ms=latency_ms, failure_rate=failure_rate)
+    os.environ['SQUARE_API_BASE_URL'] = f'http://127.0.0.1:{stub_server.server_address[1]}'
+    os.environ['SQUARE_ENVIRONMENT'] = 'production'
+    os.environ['SQUARE_ACCESS_TOKEN'] = 'stub-token'
+    os.environ['SQUARE_LOCATION_ID'] = STUB_LOCATION['id']
+    # Fresh configuration cache per run, so it is fetched from the stub once
+    os.environ['SQUARE_CACHE_PATH'] = os.path.join(tempfile.gettempdir(),
+                                                   f'thegavl-square-loadtest-{os.getpid()}.json')
+    return stub_server, stub_state
+
+
+def host_api(host: str = '127.0.0.1', port: int = 0) -> APIServer:
+    """Serve all api/ handlers from one server on a daemon thread"""
+    handler_classes = {path: load_api_module(name).handler for path, name in ROUTES.items()}
+    server = APIServer((host, port), build_router(handler_classes))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ============================================================
+# Traffic
+# ============================================================
+
+class TrafficContext:
+    """Shared state between requests, e.g. signed quotes to pay and payment IDs to verify later"""
+
+    def __init__(self, visitor_pool: int, batch_size: int, seed: int):
+        self.visitor_pool = visitor_pool
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.payment_ids: deque = deque(maxlen=1000)
+        self.quotes: Dict[str, deque] = {}  # package -> payment intents from create_payment
+        self.lock = threading.Lock()
+
+    def random_int(self, upper: int) -> int:
+        with self.lock:
+            return self.rng.randrange(upper)
+
+    def visitor_headers(self) -> Dict[str, str]:
+        # visitor_pool 0 means every beacon is a new visitor
+        n = self.random_int(self.visitor_pool) if self.visitor_pool else uuid.uuid4().int
+        return {
+            'X-Forwarded-For': f'10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}',
+            'User-Agent': f'gavl-loadtest/{n}',
+        }
+
+
+def case_payload(n: int) -> Dict[str, Any]:
+    return {
+        'case_id': f'LOAD-{n}',
+        'case_name': f'Load Test {n} v. Example',
+        'issue_area': 'contract',
+        'opinion_text': SAMPLE_OPINION,
+        'petitioner': 'Load Tester',
+        'respondent': 'Example Corp',
+    }
+
+
+def build_request(kind: str, ctx: TrafficContext) -> Tuple[str, str, Optional[Dict[str, Any]], Dict[str, str]]:
+    """(method, path, json body, headers) for one request of the given kind"""
+    headers = {}
+    if kind == 'visit':
+        headers = ctx.visitor_headers()
+        body = {
+            'page': PAGES[ctx.random_int(len(PAGES))],
+            'url': 'https://thegavl.com/',
+            'referrer': 'direct',
+        }
+        return 'POST', '/api/track-visit', body, headers
+
+    if kind == 'predict':
+        return 'POST', '/api/predict', case_payload(ctx.random_int(1_000_000)), headers
+
+    if kind == 'predict_batch':
+        cases = [case_payload(ctx.random_int(1_000_000)) for _ in range(ctx.batch_size)]
+        return 'POST', '/api/predict', {'cases': cases}, headers
+
+    package = ('single', 'professional', 'firm')[ctx.random_int(3)]
+    if kind == 'payment_create':
+        body = {'action': 'create_payment', 'package': package,
+                'email': 'load@test.local', 'name': 'Load Tester'}
+    elif kind == 'payment_process':
+        # Pay a signed quote, as the checkout page does
+        with ctx.lock:
+            quotes = ctx.quotes.get(package)
+            intent = quotes[ctx.rng.randrange(len(quotes))] if quotes else {}
+        body = {'action': 'process_payment', 'package': package, 'source_id': 'cnon:card-nonce-ok',
+                'email': 'load@test.local', 'name': 'Load Tester'}
+        body.update({key: intent.get(key) for key in
+                     ('idempotency_key', 'amount', 'currency', 'expires_at', 'signature')})
+    elif kind == 'payment_verify':
+        with ctx.lock:
+            payment_id = ctx.payment_ids[-1] if ctx.payment_ids else f'DEMO-{uuid.uuid4().hex[:12]}'
+        body = {'action': 'verify_payment', 'payment_id': payment_id}
+    else:
+        raise ValueError(f'Unknown traffic kind: {kind}')
+
+    return 'POST', '/api/square-payment', body, headers
+
+
+def send(target: Tuple[str, int], method: str, path: str, body: Optional[Dict[str, Any]],
+         headers: Dict[str, str], timeout: float) -> Tuple[int, bytes]:
+    """One request on a fresh connection (the handlers speak HTTP/1.0)"""
+    conn = http.client.HTTPConnection(target[0], target[1], timeout=timeout)
+    try:
+        payload = json.dumps(body).encode() if body is not None else None
+        if payload is not None:
+            headers = dict(headers, **{'Content-Type': 'application/json'})
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+# ============================================================
+# Measurement
+# ============================================================
+
+class Recorder:
+    """Per-endpoint latency samples and error counts"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.last_completion = 0.0
+
+    def record(self, kind: str, latency_ms: float, status: int, app_error: bool, failed: bool):
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(latency_ms)
+            counts = self.counts.setdefault(kind, {'requests': 0, 'errors': 0, 'app_errors': 0})
+            counts['requests'] += 1
+            if failed or status >= 400:
+                counts['errors'] += 1
+            elif app_error:
+                counts['app_errors'] += 1
+            self.last_completion = time.perf_counter()
+
+    def summarize(self, elapsed: float) -> Dict[str, Any]:
+        with self.lock:
+            endpoints = {kind: summarize_samples(self.latencies[kind], self.counts[kind], elapsed)
+                         for kind in sorted(self.latencies)}
+            all_samples = [ms for samples in self.latencies.values() for ms in samples]
+            totals = {'requests': 0, 'errors': 0, 'app_errors': 0}
+            for counts in self.counts.values():
+                for key in totals:
+                    totals[key] += counts[key]
+        return {
+            'overall': summarize_samples(all_samples, totals, elapsed),
+            'endpoints': endpoints,
+        }
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100.0 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def summarize_samples(samples: List[float], counts: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    requests = counts['requests']
+    return {
+        'requests': requests,
+        'throughput_rps': round(requests / elapsed, 2) if elapsed > 0 else 0.0,
+        'error_rate': round(counts['errors'] / requests, 4) if requests else 0.0,
+        'app_error_rate': round(counts['app_errors'] / requests, 4) if requests else 0.0,
+        'latency_ms': {
+            'mean': round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+            'p50': round(percentile(ordered, 50), 2),
+            'p90': round(percentile(ordered, 90), 2),
+            'p95': round(percentile(ordered, 95), 2),
+            'p99': round(percentile(ordered, 99), 2),
+            'max': round(ordered[-1], 2) if ordered else 0.0,
+        },
+    }
+
+
+def rss_kb(pid: Optional[int] = None) -> int:
+    """Resident set size of pid (default: this process) in KB"""
+    try:
+        with open(f'/proc/{pid or "self"}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # Not Linux: peak RSS of this process is the best available
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss // 1024 if sys.platform == 'darwin' else maxrss
+
+
+class Sampler(threading.Thread):
+    """Samples server RSS and visit counters while a run is in progress"""
+
+    def __init__(self, target: Tuple[str, int], interval: float, server_pid: Optional[int]):
+        super().__init__(daemon=True)
+        self.target = target
+        self.interval = interval
+        self.server_pid = server_pid
+        self.samples: List[Dict[str, Any]] = []
+        self.stopped = threading.Event()
+        self.start_time = time.perf_counter()
+
+    def sample(self):
+        point = {
+            't': round(time.perf_counter() - self.start_time, 2),
+            'rss_kb': rss_kb(self.server_pid),
+        }
+        try:
+            status, body = send(self.target, 'GET', '/api/track-visit', None, {}, 5.0)
+            if status == 200:
+                stats = json.loads(body).get('stats', {})
+                point['unique_visitors'] = stats.get('unique_visitors')
+                point['total_visits'] = stats.get('total_visits')
+        except Exception:
+            pass
+        self.samples.append(point)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> List[Dict[str, Any]]:
+        self.stopped.set()
+        self.join()
+        self.sample()
+        return self.samples
+
+
+# ============================================================
+# Runs
+# ============================================================
+
+def fire(target: Tuple[str, int], kind: str, scheduled: float, ctx: TrafficContext,
+         recorder: Recorder, timeout: float):
+    method, path, body, headers = build_request(kind, ctx)
+    status, app_error, failed = 0, False, False
+    try:
+        status, raw = send(target, method, path, body, headers, timeout)
+        try:
+            data = json.loads(raw)
+            app_error = isinstance(data, dict) and data.get('success') is False
+            if kind == 'payment_process' and app_error is False and data.get('payment_id'):
+                with ctx.lock:
+                    ctx.payment_ids.append(data['payment_id'])
+            if kind == 'payment_create' and app_error is False and data.get('payment_intent'):
+                remember_quote(ctx, data['payment_intent'])
+        except ValueError:
+            app_error = True
+    except Exception:
+        failed = True
+    recorder.record(kind, (time.perf_counter() - scheduled) * 1000, status, app_error, failed)
+
+
+def remember_quote(ctx: TrafficContext, intent: Dict[str, Any]):
+    with ctx.lock:
+        ctx.quotes.setdefault(intent['package'], deque(maxlen=100)).append(intent)
+
+
+def prime_quotes(target: Tuple[str, int], ctx: TrafficContext, timeout: float):
+    """One signed quote per package, so payment_process can run without payment_create traffic"""
+    for package in ('single', 'professional', 'firm'):
+        body = {'action': 'create_payment', 'package': package,
+                'email': 'load@test.local', 'name': 'Load Tester'}
+        _, raw = send(target, 'POST', '/api/square-payment', body, {}, timeout)
+        remember_quote(ctx, json.loads(raw)['payment_intent'])
+
+
+def run_phase(target: Tuple[str, int], mix: Dict[str, float], rate: float, duration: float,
+              workers: int, ctx: TrafficContext, timeout: float) -> Dict[str, Any]:
+    """Open-loop run: send at `rate` req/s for `duration` seconds"""
+    recorder = Recorder()
+    kinds = [kind for kind, weight in mix.items() if weight > 0]
+    weights = [mix[kind] for kind in kinds]
+    interval = 1.0 / rate
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        start = time.perf_counter()
+        n = 0
+        while True:
+            scheduled = start + n * interval
+            if scheduled - start >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            with ctx.lock:
+                kind = ctx.rng.choices(kinds, weights)[0]
+            executor.submit(fire, target, kind, scheduled, ctx, recorder, timeout)
+            n += 1
+
+    elapsed = max(recorder.last_completion - start, duration)
+    result = recorder.summarize(elapsed)
+    result['target_rps'] = rate
+    result['elapsed_s'] = round(elapsed, 2)
+    return result
+
+
+def find_saturation(target: Tuple[str, int], kind: str, args, ctx: TrafficContext) -> Dict[str, Any]:
+    """Ramp one endpoint until throughput, errors or p99 fall outside the SLO"""
+    steps = []
+    rate = args.ramp_start
+    saturation_rps = None
+
+    while rate <= args.ramp_max:
+        phase = run_phase(target, {kind: 1}, rate, args.ramp_step_seconds,
+                          args.workers, ctx, args.timeout)
+        overall = phase['overall']
+        sustained = (
+            overall['throughput_rps'] >= 0.95 * rate
+            and overall['error_rate'] <= args.max_error_rate
+            and overall['latency_ms']['p99'] <= args.slo_ms
+        )
+        steps.append({
+            'target_rps': rate,
+            'throughput_rps': overall['throughput_rps'],
+            'error_rate': overall['error_rate'],
+            'p99_ms': overall['latency_ms']['p99'],
+            'sustained': sustained,
+        })
+        print(f"  {kind:<16} {rate:>8.1f} rps -> {overall['throughput_rps']:>8.1f} rps"
+              f"  p99 {overall['latency_ms']['p99']:>8.1f} ms"
+              f"  err {overall['error_rate']:.2%}  {'ok' if sustained else 'SATURATED'}",
+              file=sys.stderr)
+        if not sustained:
+            break
+        saturation_rps = rate
+        rate = round(rate * args.ramp_factor, 1)
+
+    # reached_ramp_max: never saturated, the real limit is above --ramp-max
+    return {
+        'saturation_rps': saturation_rps,
+        'reached_ramp_max': bool(steps) and steps[-1]['sustained'],
+        'steps': steps,
+    }
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-endpoint deltas between two reports (current - baseline)"""
+    def delta(cur: Dict[str, Any], base: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'throughput_rps': round(cur['throughput_rps'] - base['throughput_rps'], 2),
+            'error_rate': round(cur['error_rate'] - base['error_rate'], 4),
+            'p50_ms': round(cur['latency_ms']['p50'] - base['latency_ms']['p50'], 2),
+            'p99_ms': round(cur['latency_ms']['p99'] - base['latency_ms']['p99'], 2),
+        }
+
+    comparison = {'endpoints': {}}
+    if 'load' in current and 'load' in baseline:
+        comparison['overall'] = delta(current['load']['overall'], baseline['load']['overall'])
+        for kind, stats in current['load']['endpoints'].items():
+            if kind in baseline['load']['endpoints']:
+                comparison['endpoints'][kind] = delta(stats, baseline['load']['endpoints'][kind])
+
+    if current.get('timeseries') and baseline.get('timeseries'):
+        comparison['final_rss_kb'] = current['timeseries'][-1]['rss_kb'] - baseline['timeseries'][-1]['rss_kb']
+
+    for kind, sat in current.get('saturation', {}).items():
+        base_sat = baseline.get('saturation', {}).get(kind)
+        if base_sat and sat['saturation_rps'] is not None and base_sat['saturation_rps'] is not None:
+            comparison['endpoints'].setdefault(kind, {})['saturation_rps'] = round(
+                sat['saturation_rps'] - base_sat['saturation_rps'], 1)
+
+    return comparison
+
+
+def print_summary(report: Dict[str, Any]):
+    if 'load' in report:
+        load = report['load']
+        print("=" * 78)
+        print(f"Load run: {load['target_rps']} rps target for {report['config']['duration']}s")
+        print("=" * 78)
+        print(f"  {'endpoint':<16} {'reqs':>7} {'rps':>8} {'err':>7} {'app err':>8}"
+              f" {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+        rows = list(load['endpoints'].items()) + [('ALL', load['overall'])]
+        for kind, stats in rows:
+            lat = stats['latency_ms']
+            print(f"  {kind:<16} {stats['requests']:>7} {stats['throughput_rps']:>8.1f}"
+                  f" {stats['error_rate']:>7.2%} {stats['app_error_rate']:>8.2%}"
+                  f" {lat['p50']:>8.1f} {lat['p95']:>8.1f}"
+                  f" {lat['p99']:>8.1f} {lat['max']:>8.1f}")
+
+    if report.get('timeseries'):
+        first, last = report['timeseries'][0], report['timeseries'][-1]
+        print(f"\n  RSS: {first['rss_kb']:,} KB -> {last['rss_kb']:,} KB"
+              f"   unique visitors: {first.get('unique_visitors')} -> {last.get('unique_visitors')}")
+
+    if report.get('saturation'):
+        print("\n  Saturation points:")
+        for kind, sat in report['saturation'].items():
+            limit = sat['saturation_rps'] or 'below ramp start'
+            print(f"    {kind:<16} {limit} rps{' (ramp max reached)' if sat['reached_ramp_max'] else ''}")
+
+    if report.get('comparison'):
+        print("\n  Versus baseline (current - baseline):")
+        for kind, diff in report['comparison'].get('endpoints', {}).items():
+            print(f"    {kind:<16} " + '  '.join(f'{key} {value:+}' for key, value in diff.items()))
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise SystemExit(f'Unknown traffic kind {kind!r}; choose from {", ".join(DEFAULT_MIX)}')
+        mix[kind] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the api/ functions locally')
+    parser.add_argument('--rate', type=float, default=50.0, help='Target requests per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+    parser.add_argument('--mix', type=parse_mix, default=dict(DEFAULT_MIX),
+                        help='Weights, e.g. visit=60,predict=20,predict_batch=5,payment_create=8,'
+                             'payment_process=5,payment_verify=2')
+    parser.add_argument('--batch-size', type=int, default=25, help='Cases per batch prediction')
+    parser.add_argument('--visitor-pool', type=int, default=0,
+                        help='Distinct visitors to draw from (0 = every beacon is new)')
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--sample-interval', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--square-latency-ms', type=float, default=150.0)
+    parser.add_argument('--square-failure-rate', type=float, default=0.0)
+    parser.add_argument('--saturation', action='store_true', help='Ramp each endpoint to saturation')
+    parser.add_argument('--ramp-start', type=float, default=10.0)
+    parser.add_argument('--ramp-factor', type=float, default=1.5)
+    parser.add_argument('--ramp-max', type=float, default=2000.0)
+    parser.add_argument('--ramp-step-seconds', type=float, default=5.0)
+    parser.add_argument('--slo-ms', type=float, default=500.0, help='p99 limit for a sustained step')
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--serve', action='store_true', help='Only host the API and Square stub')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--target', help='Drive an already running server instead of hosting one')
+    parser.add_argument('--server-pid', type=int, help='PID whose RSS to sample with --target')
+    parser.add_argument('--report', help='Write the JSON report here')
+    parser.add_argument('--compare', help='Baseline JSON report to diff against')
+    args = parser.parse_args()
+
+    stub_state = None
+    if args.target:
+        parsed = urlsplit(args.target)
+        target = (parsed.hostname, parsed.port or 80)
+    else:
+        _, stub_state = configure_square_stub(args.square_latency_ms, args.square_failure_rate)
+        server = host_api(port=args.port)
+        target = server.server_address[:2]
+        if args.serve:
+            print(f"Serving api/ on http://{target[0]}:{target[1]} (pid {os.getpid()})")
+            threading.Event().wait()
+
+    ctx = TrafficContext(args.visitor_pool, args.batch_size, args.seed)
+    prime_quotes(target, ctx, args.timeout)
+    report = {
+        'report_version': REPORT_VERSION,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'config': {key: value for key, value in vars(args).items()
+                   if key not in ('report', 'compare', 'serve')},
+        'target': f'http://{target[0]}:{target[1]}',
+    }
+
+    # Handlers print a log line per visit; keep them out of the report output
+    with redirect_stdout(NullWriter()):
+        sampler = Sampler(target, args.sample_interval, args.server_pid)
+        sampler.start()
+        if args.saturation:
+            print(f"Ramping each endpoint from {args.ramp_start} rps (x{args.ramp_factor})",
+                  file=sys.stderr)
+            report['saturation'] = {kind: find_saturation(target, kind, args, ctx)
+                                    for kind, weight in args.mix.items() if weight > 0}
+        else:
+            print(f"Running {args.rate} rps for {args.duration}s...", file=sys.stderr)
+            report['load'] = run_phase(target, args.mix, args.rate, args.duration,
+                                       args.workers, ctx, args.timeout)
+        report['timeseries'] = sampler.stop()
+
+    if stub_state is not None:
+        report['square_stub'] = {'requests': stub_state.requests,
+                                 'payments': len(stub_state.payments),
+                                 'paths': dict(stub_state.paths)}
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            report['comparison'] = compare_reports(report, json.load(baseline_file))
+
+    print_summary(report)
+
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"\nReport written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
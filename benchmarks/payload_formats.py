@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Prediction Payload Format Benchmark
+Encodes single and batch /api/predict responses in every negotiable format
+(JSON rows, columnar JSON, MessagePack when installed; with and without
+fields=/precision=) and reports body size plus encode time, uncompressed,
+gzip and brotli (when installed).
+
+    python3 benchmarks/payload_formats.py --batch-sizes 1 25 125
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, Any, List
+
+from _harness import API_DIR, load_api_module
+
+sys.path.insert(0, str(API_DIR))
+from _runtime import compress, optional_module
+
+predict = load_api_module('predict')
+
+CORE_FIELDS = ('case_id', 'predicted_outcome', 'probability', 'confidence')
+
+
+def variants() -> List[Dict[str, Any]]:
+    """(name, format, layout, fields, precision) combinations to measure"""
+    combos = [
+        ('json', 'json', 'rows', None, None),
+        ('json precision=4', 'json', 'rows', None, 4),
+        ('json core fields', 'json', 'rows', CORE_FIELDS, 4),
+        ('columnar', 'json', 'columnar', None, 4),
+        ('columnar core fields', 'json', 'columnar', CORE_FIELDS, 4),
+    ]
+    if optional_module('msgpack') is not None:
+        combos += [
+            ('msgpack', 'msgpack', 'rows', None, None),
+            ('msgpack columnar', 'msgpack', 'columnar', None, 4),
+        ]
+    return [{'name': name, 'format': fmt, 'layout': layout, 'fields': fields, 'precision': precision}
+            for name, fmt, layout, fields, precision in combos]
+
+
+def sample_response(batch_size: int) -> Dict[str, Any]:
+    cases = [{
+        'case_id': f'BENCH-{i:04d}',
+        'case_name': f'Bench {i} v. Payload',
+        'issue_area': 'contract',
+        'opinion_text': ('Strong evidence and clear facts. ' if i % 2 else 'Procedural problem noted. ') * 20
+    } for i in range(batch_size)]
+
+    response = predict.predict_batch(cases) if batch_size > 1 else predict.predict_case(cases[0])
+    response['processing_time_ms'] = 0.42
+    response['timestamp'] = '2025-01-01T00:00:00Z'
+    return response
+
+
+def timed(fn, iterations: int):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = fn()
+    return result, (time.perf_counter() - start) / iterations * 1e6
+
+
+def measure(response: Dict[str, Any], options: Dict[str, Any], iterations: int) -> Dict[str, Any]:
+    body, encode_us = timed(
+        lambda: predict.encode_response(predict.shape_response(response, options), options), iterations)
+    stats = {'bytes': len(body), 'encode_us': round(encode_us, 1)}
+
+    encodings = ['gzip'] + (['br'] if optional_module('brotli') is not None else [])
+    for encoding in encodings:
+        compressed, compress_us = timed(lambda: compress(body, encoding), max(iterations // 10, 1))
+        stats[f'{encoding}_bytes'] = len(compressed)
+        stats[f'{encoding}_us'] = round(compress_us, 1)
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare /api/predict payload formats')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 25, 125])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    results = {}
+    for batch_size in args.batch_sizes:
+        response = sample_response(batch_size)
+        results[batch_size] = {variant['name']: measure(response, variant, args.iterations)
+                               for variant in variants()}
+
+    for batch_size, formats in results.items():
+        baseline = formats['json']['bytes']
+        print("=" * 78)
+        print(f"Batch of {batch_size}")
+        print("=" * 78)
+        for name, stats in formats.items():
+            compressed = '   '.join(f"{encoding} {stats[f'{encoding}_bytes']:>7,} B ({stats[f'{encoding}_us']:>7.1f} us)"
+                                   for encoding in ('gzip', 'br') if f'{encoding}_bytes' in stats)
+            print(f"  {name:<22} {stats['bytes']:>8,} B {stats['bytes'] / baseline:>6.1%}"
+                  f"  encode {stats['encode_us']:>8.1f} us   {compressed}")
+
+    print()
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Square Configuration Cache Check
+Runs api/square-payment.py against the local Square stub (with latency) and
+times create_payment through three lifecycles of the configuration cache:
+
+  cold       no cache file: intents come from the environment while the
+             first fetch runs in the background
+  restart    a new process-equivalent service loads the cache file; no
+             Square calls at all
+  expired    TTL elapsed: requests keep being served while one background
+             refresh replaces the configuration
+
+--catalog-forbidden makes the catalog return 403 (a token without
+ITEMS_READ): locations must still be cached, with built-in prices.
+
+    python3 benchmarks/square_config.py --square-latency-ms 150
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stderr
+from typing import Dict, Any
+
+from _harness import NullWriter, build_request, invoke, load_api_module, split_response
+from square_stub import STUB_LOCATION, start_stub
+
+REQUEST = json.dumps({'action': 'create_payment', 'package': 'firm',
+                      'email': 'config@test.local', 'name': 'Config Check'}).encode()
+
+
+def create_payments(module, count: int) -> Dict[str, Any]:
+    """Time count create_payment requests; report latency and the quoted price"""
+    raw = build_request('POST', '/api/square-payment', REQUEST, {'Content-Type': 'application/json'})
+    latencies = []
+    with redirect_stderr(NullWriter()):
+        for _ in range(count):
+            start = time.perf_counter()
+            response, _ = invoke(module.handler, raw)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    intent = json.loads(split_response(response)[2])['payment_intent']
+    return {
+        'requests': count,
+        'median_ms': round(statistics.median(latencies), 3),
+        'max_ms': round(max(latencies), 3),
+        'firm_amount': intent['amount'],
+        'source': module.square_config.source,
+    }
+
+
+def wait_for_refresh(service, timeout: float = 10.0):
+    deadline = time.time() + timeout
+    while service._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exercise the Square configuration cache offline')
+    parser.add_argument('--square-latency-ms', type=float, default=150.0)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--catalog-forbidden', action='store_true')
+    args = parser.parse_args()
+
+    stub_server, stub_state = start_stub(latency_ms=args.square_latency_ms,
+                                         catalog_forbidden=args.catalog_forbidden)
+    cache_path = os.path.join(tempfile.mkdtemp(prefix='thegavl-square-'), 'square-config.json')
+    os.environ.update({
+        'SQUARE_API_BASE_URL': f'http://127.0.0.1:{stub_server.server_address[1]}',
+        'SQUARE_ENVIRONMENT': 'production',
+        'SQUARE_ACCESS_TOKEN': 'stub-token',
+        # Unset so the location must come from the locations fetch
+        'SQUARE_LOCATION_ID': '',
+        'SQUARE_CACHE_PATH': cache_path,
+    })
+
+    results = {}
+
+    # Cold: importing the handler starts the first fetch in the background
+    module = load_api_module('square-payment')
+    results['cold'] = create_payments(module, args.requests)
+    wait_for_refresh(module.square_config)
+    results['cold']['after_refresh'] = create_payments(module, 1)['source']
+    calls_after_cold = stub_state.requests
+
+    # Restart: a fresh service reads the cache file instead of calling Square
+    module.square_config = module.SquareConfigService(module.PACKAGES)
+    module.square_config.warm()
+    results['restart'] = create_payments(module, args.requests)
+    results['restart']['square_calls'] = stub_state.requests - calls_after_cold
+
+    # Expired: serving continues while exactly one refresh runs
+    module.square_config.ttl_seconds = 0
+    results['expired'] = create_payments(module, args.requests)
+    wait_for_refresh(module.square_config)
+    results['expired']['square_calls'] = stub_state.requests - calls_after_cold
+    results['expired']['after_refresh'] = module.square_config.source
+
+    results['stub_paths'] = dict(stub_state.paths)
+    results['status'] = module.square_config.status()
+
+    print("=" * 72)
+    print(f"create_payment with Square stub latency {args.square_latency_ms} ms")
+    print("=" * 72)
+    for phase in ('cold', 'restart', 'expired'):
+        stats = results[phase]
+        print(f"  {phase:<8} median {stats['median_ms']:>7.3f} ms   max {stats['max_ms']:>8.3f} ms"
+              f"   served from {stats['source']:<11} firm price {stats['firm_amount']}")
+    print(f"  Square calls: {results['stub_paths']}")
+    print()
+    print(json.dumps(results, indent=2))
+
+    stub_server.shutdown()
+    ok = results['restart']['square_calls'] == 0 and results['status']['location_id'] == STUB_LOCATION['id']
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Local Square API Stub
+Answers the subset of the Square API that api/square-payment.py uses
+(locations, catalog listing, payments), with configurable latency and
+failure rate, so payment flows and the configuration cache can be exercised
+offline and under load.
+
+    python3 benchmarks/square_stub.py --port 8787 --latency-ms 150
+    SQUARE_API_BASE_URL=http://127.0.0.1:8787 SQUARE_ENVIRONMENT=production \\
+        SQUARE_ACCESS_TOKEN=stub ...
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+
+STUB_LOCATION = {
+    'id': 'LSTUB0000000001',
+    'name': 'TheGAVL (stub)',
+    'status': 'ACTIVE',
+    'currency': 'USD',
+    'country': 'US',
+    'address': {'address_line_1': '1 Stub Way'}
+}
+
+
+def catalog_item(item_id: str, name: str, sku: str, amount: int) -> Dict[str, Any]:
+    """Catalog ITEM object with a single priced variation"""
+    return {
+        'type': 'ITEM',
+        'id': item_id,
+        'item_data': {
+            'name': name,
+            'variations': [{
+                'type': 'ITEM_VARIATION',
+                'id': f'{item_id}V',
+                'item_variation_data': {
+                    'item_id': item_id,
+                    'name': 'Regular',
+                    'sku': sku,
+                    'pricing_type': 'FIXED_PRICING',
+                    'price_money': {'amount': amount, 'currency': 'USD'}
+                }
+            }]
+        }
+    }
+
+
+# Matches PACKAGES in api/square-payment.py by SKU (single, professional) and
+# by item name (Firm Package); the Firm price differs so catalog pricing is visible
+STUB_CATALOG = [
+    catalog_item('ISTUBSINGLE0001', 'Single Verdict', 'single', 3900),
+    catalog_item('ISTUBPRO0000001', 'Professional Package', 'professional', 39900),
+    catalog_item('ISTUBFIRM000001', 'Firm Package', '', 94900),
+]
+
+
+class SquareStubState:
+    """Payments taken by the stub, plus its latency/failure settings"""
+
+    def __init__(self, latency_ms: float = 0.0, failure_rate: float = 0.0,
+                 catalog: Optional[List[Dict[str, Any]]] = None, catalog_forbidden: bool = False):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.catalog = STUB_CATALOG if catalog is None else catalog
+        self.catalog_forbidden = catalog_forbidden  # Token without ITEMS_READ
+        self.payments: Dict[str, Dict[str, Any]] = {}
+        self.requests = 0
+        self.paths: Counter = Counter()
+        self.lock = threading.Lock()
+
+
+class SquareStubHandler(BaseHTTPRequestHandler):
+    """Stub of the Square v2 REST endpoints"""
+
+    protocol_version = 'HTTP/1.1'
+    state: SquareStubState = SquareStubState()
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status_code: int, data: Dict[str, Any]):
+        body = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def simulate(self) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Apply configured latency; returns an error response to send, if any"""
+        with self.state.lock:
+            self.state.requests += 1
+            path = self.path.split('?', 1)[0]
+            if path.startswith('/v2/payments/'):
+                path = '/v2/payments/{id}'
+            self.state.paths[f'{self.command} {path}'] += 1
+
+        if self.state.latency_ms:
+            # Square latency has a long tail; jitter +/- 50% around the mean
+            time.sleep(self.state.latency_ms * random.uniform(0.5, 1.5) / 1000.0)
+
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return 401, {'errors': [{'category': 'AUTHENTICATION_ERROR', 'detail': 'Missing token'}]}
+
+        if self.state.failure_rate and random.random() < self.state.failure_rate:
+            return 503, {'errors': [{'category': 'API_ERROR', 'detail': 'Stub injected failure'}]}
+
+        return None
+
+    def do_GET(self):
+        error = self.simulate()
+        if error:
+            return self.send_json(*error)
+
+        if self.path == '/v2/locations':
+            return self.send_json(200, {'locations': [STUB_LOCATION]})
+
+        if self.path.split('?', 1)[0] == '/v2/catalog/list':
+            if self.state.catalog_forbidden:
+                return self.send_json(403, {'errors': [{'category': 'AUTHENTICATION_ERROR',
+                                                        'code': 'INSUFFICIENT_SCOPES',
+                                                        'detail': 'ITEMS_READ required'}]})
+            return self.send_json(200, {'objects': self.state.catalog})
+
+        if self.path.startswith('/v2/payments/'):
+            payment_id = self.path.rsplit('/', 1)[-1]
+            with self.state.lock:
+                payment = self.state.payments.get(payment_id)
+            if payment:
+                return self.send_json(200, {'payment': payment})
+            return self.send_json(404, {'errors': [{'category': 'INVALID_REQUEST_ERROR',
+                                                    'detail': 'Payment not found'}]})
+
+        self.send_json(404, {'errors': [{'detail': f'Unknown path {self.path}'}]})
+
+    def do_POST(self):
+        content_length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(content_length) or b'{}')
+
+        error = self.simulate()
+        if error:
+            return self.send_json(*error)
+
+        if self.path == '/v2/payments':
+            payment = {
+                'id': f'STUB{uuid.uuid4().hex[:18].upper()}',
+                'status': 'COMPLETED',
+                'amount_money': body.get('amount_money', {}),
+                'location_id': body.get('location_id'),
+                'note': body.get('note'),
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+            }
+            with self.state.lock:
+                self.state.payments[payment['id']] = payment
+            return self.send_json(200, {'payment': payment})
+
+        self.send_json(404, {'errors': [{'detail': f'Unknown path {self.path}'}]})
+
+
+def start_stub(host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0.0,
+               failure_rate: float = 0.0,
+               catalog: Optional[List[Dict[str, Any]]] = None,
+               catalog_forbidden: bool = False) -> Tuple[ThreadingHTTPServer, SquareStubState]:
+    """Start the stub on a daemon thread; port 0 picks a free port"""
+    state = SquareStubState(latency_ms, failure_rate, catalog, catalog_forbidden)
+    handler_cls = type('SquareStub', (SquareStubHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler_cls)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local Square API stub')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, _ = start_stub(args.host, args.port, args.latency_ms, args.failure_rate)
+    print(f"Square stub listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
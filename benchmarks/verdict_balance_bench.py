@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Verdict Balance Benchmark
+Compares balance lookup and usage recording latency between the legacy
+aggregate view and the trigger-maintained user_verdict_balances table.
+
+Run against a scratch PostgreSQL database (never production):
+    pip install psycopg2-binary
+    python3 benchmarks/verdict_balance_bench.py --dsn postgresql://localhost/gavl_bench
+
+Loads VERDICT_PURCHASES_SCHEMA.sql into a throwaway schema, seeds it with
+--usage-rows usage rows (default 1,000,000) spread across --users users,
+then times both code paths on the same data.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+SCHEMA_FILE = Path(__file__).resolve().parent.parent / 'VERDICT_PURCHASES_SCHEMA.sql'
+BENCH_SCHEMA = 'gavl_balance_bench'
+
+# Supabase provides these; a plain PostgreSQL scratch database does not
+SUPABASE_SHIMS = """
+CREATE SCHEMA IF NOT EXISTS auth;
+CREATE OR REPLACE FUNCTION auth.jwt() RETURNS JSONB AS $$ SELECT '{}'::jsonb $$ LANGUAGE sql;
+DO $$ BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'anon') THEN CREATE ROLE anon; END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'authenticated') THEN CREATE ROLE authenticated; END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN CREATE ROLE service_role; END IF;
+END $$;
+"""
+
+USERS_TABLE = """
+CREATE TABLE gavl_users (
+  email VARCHAR(255) PRIMARY KEY,
+  name VARCHAR(255),
+  enrollment_date TIMESTAMPTZ DEFAULT NOW()
+);
+"""
+
+# The pre-materialization view and function, kept verbatim for comparison
+LEGACY_OBJECTS = """
+CREATE VIEW legacy_user_verdict_balance AS
+SELECT
+  u.email,
+  u.name,
+  CASE
+    WHEN EXTRACT(DAY FROM (NOW() - u.enrollment_date)) <= 14 THEN 2
+    ELSE 0
+  END - COALESCE(trial_used.count, 0) AS trial_verdicts_remaining,
+  COALESCE(purchased.total_verdicts, 0) - COALESCE(purchased_used.count, 0) AS purchased_verdicts_remaining,
+  (CASE
+    WHEN EXTRACT(DAY FROM (NOW() - u.enrollment_date)) <= 14 THEN 2
+    ELSE 0
+  END - COALESCE(trial_used.count, 0)) +
+  (COALESCE(purchased.total_verdicts, 0) - COALESCE(purchased_used.count, 0)) AS total_verdicts_available
+FROM gavl_users u
+LEFT JOIN (
+  SELECT user_email, COUNT(*) as count
+  FROM verdict_usage
+  WHERE verdict_type = 'trial'
+  GROUP BY user_email
+) trial_used ON u.email = trial_used.user_email
+LEFT JOIN (
+  SELECT user_email, SUM(verdicts_purchased) as total_verdicts
+  FROM verdict_purchases
+  WHERE status = 'completed'
+    AND expiration_date > NOW()
+  GROUP BY user_email
+) purchased ON u.email = purchased.user_email
+LEFT JOIN (
+  SELECT user_email, COUNT(*) as count
+  FROM verdict_usage
+  WHERE verdict_type = 'purchased'
+  GROUP BY user_email
+) purchased_used ON u.email = purchased_used.user_email;
+
+CREATE FUNCTION legacy_record_verdict_usage(
+  p_user_email VARCHAR(255),
+  p_case_id VARCHAR(100),
+  p_case_metadata JSONB DEFAULT '{}'
+) RETURNS JSONB AS $$
+DECLARE
+  v_trial_remaining INTEGER;
+  v_purchased_remaining INTEGER;
+  v_verdict_type VARCHAR(50);
+  v_purchase_id BIGINT;
+  v_result JSONB;
+BEGIN
+  SELECT trial_verdicts_remaining, purchased_verdicts_remaining
+  INTO v_trial_remaining, v_purchased_remaining
+  FROM legacy_user_verdict_balance
+  WHERE email = p_user_email;
+
+  IF v_trial_remaining > 0 THEN
+    v_verdict_type := 'trial';
+    v_purchase_id := NULL;
+  ELSIF v_purchased_remaining > 0 THEN
+    v_verdict_type := 'purchased';
+    SELECT id INTO v_purchase_id
+    FROM verdict_purchases
+    WHERE user_email = p_user_email
+      AND status = 'completed'
+      AND expiration_date > NOW()
+    ORDER BY purchase_date ASC
+    LIMIT 1;
+  ELSE
+    RETURN jsonb_build_object('success', false, 'error', 'No verdicts available');
+  END IF;
+
+  INSERT INTO verdict_usage (user_email, case_id, verdict_type, purchase_id, case_metadata)
+  VALUES (p_user_email, p_case_id, v_verdict_type, v_purchase_id, p_case_metadata);
+
+  SELECT jsonb_build_object(
+    'success', true,
+    'verdict_type', v_verdict_type,
+    'trial_remaining', trial_verdicts_remaining,
+    'purchased_remaining', purchased_verdicts_remaining,
+    'total_remaining', total_verdicts_available
+  ) INTO v_result
+  FROM legacy_user_verdict_balance
+  WHERE email = p_user_email;
+
+  RETURN v_result;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def setup(cur, users: int, usage_rows: int):
+    """Create the bench schema, load the real schema file and seed data"""
+    cur.execute(SUPABASE_SHIMS)
+    cur.execute(f'DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE')
+    cur.execute(f'CREATE SCHEMA {BENCH_SCHEMA}')
+    cur.execute(f'SET search_path TO {BENCH_SCHEMA}, public')
+    cur.execute(USERS_TABLE)
+    # SECURITY DEFINER functions pin search_path to public; point them at the bench schema
+    cur.execute(SCHEMA_FILE.read_text().replace('SET search_path = public',
+                                                f'SET search_path = {BENCH_SCHEMA}, public'))
+    cur.execute(LEGACY_OBJECTS)
+
+    print(f"Seeding {users:,} users, {usage_rows:,} usage rows...")
+    cur.execute("""
+        INSERT INTO gavl_users (email, name, enrollment_date)
+        SELECT 'user' || g || '@bench.test', 'User ' || g, NOW() - (g % 30) * INTERVAL '1 day'
+        FROM generate_series(1, %s) g
+    """, (users,))
+    # Enough purchased verdicts that nobody runs dry mid-benchmark
+    cur.execute("""
+        INSERT INTO verdict_purchases (user_email, purchase_type, verdicts_purchased, amount_paid,
+                                       stripe_payment_id, validity_days, expiration_date, status)
+        SELECT 'user' || g || '@bench.test', 'firm', %s, 999.00, 'bench_' || g, 180,
+               NOW() + INTERVAL '180 days', 'completed'
+        FROM generate_series(1, %s) g
+    """, (usage_rows // users + 10_000, users))
+    cur.execute("""
+        INSERT INTO verdict_usage (user_email, case_id, verdict_type, case_metadata)
+        SELECT 'user' || (g % %s + 1) || '@bench.test', 'CASE-' || g, 'purchased',
+               '{"case_type": "constitutional"}'::jsonb
+        FROM generate_series(1, %s) g
+    """, (users, usage_rows))
+    cur.execute('ANALYZE')
+
+
+def time_query(cur, sql: str, emails: List[str], iterations: int) -> Dict[str, float]:
+    """Run sql once per iteration, cycling through emails, and summarize latency"""
+    samples = []
+    for i in range(iterations):
+        email = emails[i % len(emails)]
+        start = time.perf_counter()
+        cur.execute(sql, (email,))
+        cur.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'mean_ms': round(statistics.mean(samples), 3),
+        'p50_ms': round(samples[len(samples) // 2], 3),
+        'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
+
+
+def run(dsn: str, users: int, usage_rows: int, iterations: int) -> Dict[str, Any]:
+    """Set up the bench schema and time legacy vs maintained code paths"""
+    try:
+        import psycopg2
+    except ImportError:
+        sys.exit('psycopg2 is required: pip install psycopg2-binary')
+
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    try:
+        setup(cur, users, usage_rows)
+        emails = [f'user{i}@bench.test' for i in range(1, min(users, 500) + 1)]
+
+        # Legacy inserts also fire the balance triggers; the view cost dominates
+        results = {
+            'usage_rows': usage_rows,
+            'users': users,
+            'lookup': {
+                'legacy_view': time_query(
+                    cur, 'SELECT * FROM legacy_user_verdict_balance WHERE email = %s',
+                    emails, iterations),
+                'balance_table': time_query(
+                    cur, 'SELECT get_verdict_balance(%s)', emails, iterations),
+            },
+            'record': {
+                'legacy_view': time_query(
+                    cur, "SELECT legacy_record_verdict_usage(%s, 'BENCH-LEGACY')",
+                    emails, iterations),
+                'balance_table': time_query(
+                    cur, "SELECT record_verdict_usage(%s, 'BENCH-NEW')",
+                    emails, iterations),
+            },
+        }
+    finally:
+        cur.execute(f'DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE')
+        conn.close()
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark verdict balance lookups')
+    parser.add_argument('--dsn', required=True, help='Scratch PostgreSQL DSN')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--usage-rows', type=int, default=1_000_000)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    results = run(args.dsn, args.users, args.usage_rows, args.iterations)
+
+    print("=" * 60)
+    print(f"Verdict balance benchmark ({results['usage_rows']:,} usage rows)")
+    print("=" * 60)
+    for operation in ('lookup', 'record'):
+        for variant, stats in results[operation].items():
+            print(f"  {operation:<7} {variant:<14} mean {stats['mean_ms']:>9.3f} ms"
+                  f"  p50 {stats['p50_ms']:>9.3f} ms  p99 {stats['p99_ms']:>9.3f} ms")
+    print()
+    print(json.dumps(results, indent=2))
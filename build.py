@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Static site build for TheGAVL
+Minifies the hand-written HTML (and the CSS/JS inside it), moves inline
+blocks shared by several pages and the local js/ files into content-hashed
+files under /assets/, and writes gzip and brotli variants of every text
+asset into dist/.
+
+    python3 build.py                    # build dist/ and print the size report
+    python3 build.py --update-vercel    # also write Cache-Control rules to vercel.json
+
+Brotli variants need `pip install brotli`; without it only gzip is written.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = Path(__file__).resolve().parent
+DIST = ROOT / 'dist'
+ASSETS_DIR = 'assets'
+
+# Never shipped as static files
+EXCLUDE_NAMES = {'build.py', 'get_square_location.py', 'requirements.txt',
+                 'vercel.json', 'VERDICT_PURCHASES_SCHEMA.sql'}
+EXCLUDE_DIRS = {'.git', 'api', 'benchmarks', 'dist', '__pycache__', 'node_modules'}
+EXCLUDE_SUFFIXES = {'.md', '.py', '.pyc', '.sql', '.jsonl'}
+
+PRECOMPRESS_SUFFIXES = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.xml'}
+PRECOMPRESS_MIN_BYTES = 512
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'public, max-age=0, must-revalidate'
+
+# Inline <script> types that hold JavaScript (others, e.g. JSON-LD, are left alone)
+JS_TYPES = {'', 'text/javascript', 'application/javascript', 'module'}
+
+
+# ============================================================
+# Minifiers
+# ============================================================
+
+def _scan_quoted(src: str, i: int, quote: str) -> int:
+    """Index just past the string/template literal starting at src[i]"""
+    i += 1
+    depth = 0
+    while i < len(src):
+        c = src[i]
+        if c == '\\':
+            i += 2
+            continue
+        if quote == '`':
+            if c == '$' and src[i + 1:i + 2] == '{':
+                depth += 1
+                i += 2
+                continue
+            if c == '}' and depth:
+                depth -= 1
+            elif c == '`' and not depth:
+                return i + 1
+        elif c == quote or (c == '\n' and quote != '`'):
+            return i + 1
+        i += 1
+    return i
+
+
+def _scan_regex(src: str, i: int) -> int:
+    """Index just past the regex literal (including flags) starting at src[i]"""
+    i += 1
+    in_class = False
+    while i < len(src):
+        c = src[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            return i
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            i += 1
+            while i < len(src) and (src[i].isalnum() or src[i] == '_'):
+                i += 1
+            return i
+        i += 1
+    return i
+
+
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'in', 'of', 'delete', 'void', 'throw', 'new', 'yield')
+_JS_SPACE_ABSORBERS = set('{}()[];,:=?!&|*%^~')
+
+
+def minify_js(src: str) -> str:
+    """
+    Conservative JS minifier: drops comments and collapses whitespace
+
+    Line breaks are kept (except after { ; ,) so automatic semicolon
+    insertion behaves exactly as in the source. Strings, template literals
+    and regex literals are copied verbatim.
+    """
+    out: List[str] = []
+    pending_space = ''
+    i = 0
+    n = len(src)
+
+    def last_char() -> str:
+        return out[-1][-1] if out else ''
+
+    def emit(token: str):
+        nonlocal pending_space
+        if pending_space and out:
+            prev = last_char()
+            if pending_space == '\n' and prev not in '{;,':
+                out.append('\n')
+            elif pending_space == ' ' and prev not in _JS_SPACE_ABSORBERS \
+                    and token[0] not in _JS_SPACE_ABSORBERS:
+                out.append(' ')
+        pending_space = ''
+        out.append(token)
+
+    while i < n:
+        c = src[i]
+
+        if c in ' \t\r\n\f\v':
+            j = i
+            while j < n and src[j] in ' \t\r\n\f\v':
+                j += 1
+            if '\n' in src[i:j] or pending_space == '\n':
+                pending_space = '\n'
+            else:
+                pending_space = pending_space or ' '
+            i = j
+            continue
+
+        if c in '"\'`':
+            j = _scan_quoted(src, i, c)
+            emit(src[i:j])
+            i = j
+            continue
+
+        if c == '/':
+            nxt = src[i + 1:i + 2]
+            if nxt == '/':
+                j = src.find('\n', i)
+                i = n if j == -1 else j
+                continue
+            if nxt == '*':
+                j = src.find('*/', i + 2)
+                j = n if j == -1 else j + 2
+                if '\n' in src[i:j]:
+                    pending_space = '\n'
+                else:
+                    pending_space = pending_space or ' '
+                i = j
+                continue
+
+            prev = last_char()
+            if not prev or prev in _REGEX_PRECEDERS or out[-1] in _REGEX_KEYWORDS:
+                j = _scan_regex(src, i)
+                emit(src[i:j])
+                i = j
+                continue
+
+        j = i + 1
+        if c.isalnum() or c in '_$':
+            while j < n and (src[j].isalnum() or src[j] in '_$'):
+                j += 1
+        emit(src[i:j])
+        i = j
+
+    return ''.join(out).strip()
+
+
+def _compact_css(code: str) -> str:
+    code = re.sub(r'\s+', ' ', code)
+    code = re.sub(r' ?([{};,>]) ?', r'\1', code)
+    code = re.sub(r' ?!important', '!important', code)
+    return code.replace(';}', '}')
+
+
+def minify_css(src: str) -> str:
+    """Drop comments and whitespace that CSS does not need"""
+    parts: List[str] = []
+    code: List[str] = []
+    i = 0
+    while i < len(src):
+        c = src[i]
+        if c in '"\'':
+            j = _scan_quoted(src, i, c)
+            parts.append(_compact_css(''.join(code)))
+            parts.append(src[i:j])
+            code = []
+            i = j
+        elif src.startswith('/*', i):
+            j = src.find('*/', i + 2)
+            i = len(src) if j == -1 else j + 2
+            code.append(' ')
+        else:
+            j = i
+            while j < len(src) and src[j] not in '"\'' and not src.startswith('/*', j):
+                j += 1
+            code.append(src[i:j])
+            i = j
+
+    parts.append(_compact_css(''.join(code)))
+    return ''.join(parts).strip()
+
+
+_PROTECTED_HTML = re.compile(r'<(pre|textarea|script|style)\b[^>]*>.*?</\1\s*>', re.S | re.I)
+
+
+def minify_html(html: str) -> str:
+    """Strip comments and collapse whitespace outside pre/textarea/script/style"""
+    protected: List[str] = []
+
+    def stash(match: re.Match) -> str:
+        protected.append(match.group(0))
+        return f'\x00{len(protected) - 1}\x00'
+
+    html = _PROTECTED_HTML.sub(stash, html)
+    html = re.sub(r'<!--(?!\[if|<!|>).*?-->', '', html, flags=re.S)
+    html = re.sub(r'[ \t\r\f\v]*\n\s*', '\n', html)
+    html = re.sub(r'[ \t\r\f\v]+', ' ', html)
+    html = re.sub(r'\x00(\d+)\x00', lambda m: protected[int(m.group(1))], html)
+    return html.strip() + '\n'
+
+
+# ============================================================
+# Build
+# ============================================================
+
+_INLINE_BLOCK = re.compile(r'<(style|script)\b([^>]*)>(.*?)</\1\s*>', re.S | re.I)
+_LOCAL_REF = re.compile(r'''(<(?:script|link)\b[^>]*?\b(?:src|href)=)(["'])([^"':]+?\.(?:js|css))\2''', re.I)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def attr(attrs: str, name: str) -> Optional[str]:
+    match = re.search(rf'\b{name}\s*=\s*(["\'])(.*?)\1', attrs, re.I)
+    return match.group(2) if match else None
+
+
+def minify_block(tag: str, attrs: str, body: str) -> Optional[str]:
+    """Minified body of an inline <style>/<script>, or None to leave it alone"""
+    if tag == 'style':
+        return minify_css(body)
+    if attr(attrs, 'src') is not None:
+        return None
+    if (attr(attrs, 'type') or '').lower() not in JS_TYPES:
+        return None
+    return minify_js(body)
+
+
+def extractable(tag: str, attrs: str) -> bool:
+    """Inline blocks that behave the same when moved to an external file"""
+    stripped = re.sub(r'\btype\s*=\s*(["\'])(text/css|text/javascript)\1', '', attrs, flags=re.I)
+    if tag == 'style':
+        return not re.sub(r'\bmedia\s*=\s*(["\']).*?\1', '', stripped, flags=re.I).strip()
+    return not stripped.strip()
+
+
+def collect_sources() -> Tuple[List[Path], List[Path]]:
+    """(html pages, other static files) to ship"""
+    pages, others = [], []
+    for path in sorted(ROOT.rglob('*')):
+        rel = path.relative_to(ROOT)
+        if not path.is_file() or set(rel.parts[:-1]) & EXCLUDE_DIRS or rel.parts[0] in EXCLUDE_DIRS:
+            continue
+        if path.name.startswith('.') or path.name in EXCLUDE_NAMES or path.suffix in EXCLUDE_SUFFIXES:
+            continue
+        (pages if path.suffix == '.html' else others).append(path)
+    return pages, others
+
+
+def write_asset(name: str, suffix: str, content: str, assets: Dict[str, str]) -> str:
+    """Write a content-hashed asset once and return its URL"""
+    data = content.encode()
+    filename = f'{name}.{content_hash(data)}{suffix}'
+    url = f'/{ASSETS_DIR}/{filename}'
+    if url not in assets.values():
+        (DIST / ASSETS_DIR / filename).write_bytes(data)
+    assets[f'{name}{suffix}'] = url
+    return url
+
+
+def build(shared_min_pages: int) -> Dict[str, Any]:
+    if DIST.exists():
+        shutil.rmtree(DIST)
+    (DIST / ASSETS_DIR).mkdir(parents=True)
+
+    pages, others = collect_sources()
+    assets: Dict[str, str] = {}
+
+    # Local JS/CSS files: minify, fingerprint, and keep a copy at the old path
+    # for anything outside this site that links to it directly
+    local_refs: Dict[str, str] = {}
+    for path in others:
+        rel = path.relative_to(ROOT).as_posix()
+        if path.suffix in ('.js', '.css'):
+            text = path.read_text(encoding='utf-8')
+            minified = minify_js(text) if path.suffix == '.js' else minify_css(text)
+            local_refs[rel] = write_asset(path.stem, path.suffix, minified, assets)
+            output = minified
+        else:
+            output = None
+
+        target = DIST / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if output is None:
+            shutil.copyfile(path, target)
+        else:
+            target.write_text(output, encoding='utf-8')
+
+    # First pass: minify inline blocks and count which ones several pages share
+    minified_pages: Dict[Path, List[Tuple[str, str, str, Optional[str]]]] = {}
+    block_pages: Dict[Tuple[str, str], set] = {}
+    for page in pages:
+        blocks = []
+        for match in _INLINE_BLOCK.finditer(page.read_text(encoding='utf-8')):
+            tag, attrs, body = match.group(1).lower(), match.group(2), match.group(3)
+            minified = minify_block(tag, attrs, body)
+            blocks.append((match.group(0), tag, attrs, minified))
+            if minified and extractable(tag, attrs):
+                block_pages.setdefault((tag, minified), set()).add(page)
+        minified_pages[page] = blocks
+
+    shared = {key for key, used_by in block_pages.items() if len(used_by) >= shared_min_pages}
+    shared_urls: Dict[Tuple[str, str], str] = {}
+    for index, (tag, body) in enumerate(sorted(shared)):
+        suffix = '.css' if tag == 'style' else '.js'
+        shared_urls[(tag, body)] = write_asset(f'shared-{index}', suffix, body, assets)
+
+    # Second pass: rewrite pages
+    report_pages = []
+    for page in pages:
+        source = page.read_text(encoding='utf-8')
+        html = source
+        for original, tag, attrs, minified in minified_pages[page]:
+            if minified is None:
+                continue
+            url = shared_urls.get((tag, minified)) if extractable(tag, attrs) else None
+            if url and tag == 'style':
+                media = attr(attrs, 'media')
+                media_attr = f' media="{media}"' if media else ''
+                replacement = f'<link rel="stylesheet" href="{url}"{media_attr}>'
+            elif url:
+                replacement = f'<script src="{url}"></script>'
+            else:
+                replacement = f'<{tag}{attrs}>{minified}</{tag}>'
+            html = html.replace(original, replacement, 1)
+
+        html = _LOCAL_REF.sub(
+            lambda m: f'{m.group(1)}{m.group(2)}{local_refs.get(m.group(3).lstrip("./"), m.group(3))}{m.group(2)}',
+            html)
+        html = minify_html(html)
+
+        rel = page.relative_to(ROOT).as_posix()
+        (DIST / rel).write_text(html, encoding='utf-8')
+        report_pages.append(size_report(rel, source.encode(), html.encode()))
+
+    precompressed = precompress(DIST)
+
+    return {
+        'pages': report_pages,
+        'assets': assets,
+        'shared_blocks': len(shared),
+        'precompressed_files': precompressed,
+        'brotli': brotli is not None,
+    }
+
+
+def gzip_bytes(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(data: bytes) -> Optional[bytes]:
+    return brotli.compress(data, quality=11) if brotli is not None else None
+
+
+def size_report(name: str, source: bytes, built: bytes) -> Dict[str, Any]:
+    """Bytes over the wire before and after for one page (shared assets excluded)"""
+    before_wire = len(gzip_bytes(source))
+    built_br = brotli_bytes(built)
+    after_wire = len(built_br) if built_br is not None else len(gzip_bytes(built))
+    return {
+        'page': name,
+        'source_bytes': len(source),
+        'source_gzip_bytes': before_wire,
+        'minified_bytes': len(built),
+        'minified_gzip_bytes': len(gzip_bytes(built)),
+        'minified_brotli_bytes': len(built_br) if built_br is not None else None,
+        'wire_saving_bytes': before_wire - after_wire,
+        'wire_saving_pct': round((before_wire - after_wire) / before_wire * 100, 1) if before_wire else 0.0,
+    }
+
+
+def precompress(directory: Path) -> int:
+    """Write .gz (and .br) next to every text asset worth compressing"""
+    count = 0
+    for path in sorted(directory.rglob('*')):
+        if not path.is_file() or path.suffix not in PRECOMPRESS_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        if len(data) < PRECOMPRESS_MIN_BYTES:
+            continue
+        path.with_name(path.name + '.gz').write_bytes(gzip_bytes(data))
+        compressed = brotli_bytes(data)
+        if compressed is not None:
+            path.with_name(path.name + '.br').write_bytes(compressed)
+        count += 1
+    return count
+
+
+def update_vercel_config(path: Path = ROOT / 'vercel.json'):
+    """Serve dist/, cache hashed assets forever and revalidate pages"""
+    config = json.loads(path.read_text()) if path.exists() else {}
+    config['buildCommand'] = 'python3 build.py'
+    config['outputDirectory'] = 'dist'
+
+    rules = {
+        f'/{ASSETS_DIR}/(.*)': IMMUTABLE_CACHE,
+        '/(.*).html': REVALIDATE_CACHE,
+    }
+    headers = [entry for entry in config.get('headers', []) if entry.get('source') not in rules]
+    for source, value in rules.items():
+        headers.append({'source': source, 'headers': [{'key': 'Cache-Control', 'value': value}]})
+    config['headers'] = headers
+
+    path.write_text(json.dumps(config, indent=2) + '\n')
+
+
+def print_report(result: Dict[str, Any]):
+    print("=" * 86)
+    print("TheGAVL static build")
+    print("=" * 86)
+    print(f"  {'page':<28} {'source':>9} {'src.gz':>9} {'minified':>9} {'min.gz':>9} {'min.br':>9} {'saved':>12}")
+    total_before = total_after = 0
+    for page in sorted(result['pages'], key=lambda p: -p['source_bytes']):
+        br = page['minified_brotli_bytes']
+        print(f"  {page['page']:<28} {page['source_bytes']:>9,} {page['source_gzip_bytes']:>9,}"
+              f" {page['minified_bytes']:>9,} {page['minified_gzip_bytes']:>9,}"
+              f" {'-' if br is None else f'{br:,}':>9}"
+              f" {page['wire_saving_bytes']:>6,} ({page['wire_saving_pct']:>4.1f}%)")
+        total_before += page['source_gzip_bytes']
+        total_after += page['source_gzip_bytes'] - page['wire_saving_bytes']
+
+    saved = total_before - total_after
+    pct = saved / total_before * 100 if total_before else 0.0
+    print(f"\n  Over the wire (gzip source -> {'brotli' if result['brotli'] else 'gzip'} build):"
+          f" {total_before:,} -> {total_after:,} bytes, {saved:,} saved ({pct:.1f}%)")
+    print(f"  Shared inline blocks extracted: {result['shared_blocks']}"
+          f"   Fingerprinted assets: {len(result['assets'])}"
+          f"   Precompressed files: {result['precompressed_files']}")
+    if not result['brotli']:
+        print("  brotli not installed: wrote gzip variants only (pip install brotli)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the static site into dist/')
+    parser.add_argument('--shared-min-pages', type=int, default=2,
+                        help='Extract inline blocks used by at least this many pages')
+    parser.add_argument('--update-vercel', action='store_true',
+                        help='Write buildCommand, outputDirectory and Cache-Control rules to vercel.json')
+    parser.add_argument('--report', help='Also write the size report as JSON')
+    args = parser.parse_args()
+
+    result = build(args.shared_min_pages)
+    print_report(result)
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(result, indent=2) + '\n')
+    if args.update_vercel:
+        update_vercel_config()
+        print("  vercel.json updated")
+    sys.exit(0)
@@ -0,0 +1,108 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Shared fakes and request helpers for the api/ tests. Importing this module
+puts api/ on sys.path.
+"""
+
+import importlib.util
+import io
+import json
+import sys
+from contextlib import redirect_stderr
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Optional, Tuple
+
+API_DIR = Path(__file__).resolve().parent.parent / 'api'
+sys.path.insert(0, str(API_DIR))
+
+
+class FlakyStore:
+    """Wraps a store; while down, every call fails the way an unreachable Supabase does"""
+
+    def __init__(self, store):
+        self.store = store
+        self.down = False
+
+    def __getattr__(self, name):
+        method = getattr(self.store, name)
+
+        def call(*args, **kwargs):
+            if self.down:
+                return {'success': False, 'error': 'Supabase RPC failed: timed out', 'retryable': True}
+            return method(*args, **kwargs)
+        return call
+
+
+def cases(prefix: str, count: int):
+    return [{'case_id': f'{prefix}-{i}'} for i in range(count)]
+
+
+def load_api_module(name: str) -> ModuleType:
+    """Import api/<name>.py (handler file names contain hyphens)"""
+    module_name = 'gavl_test_' + name.replace('-', '_')
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, API_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeSocket:
+    """Just enough of a socket for StreamRequestHandler; counts writes"""
+
+    def __init__(self, raw_request: bytes):
+        self.raw_request = raw_request
+        self.sent = bytearray()
+        self.writes = 0
+
+    def makefile(self, mode: str, buffering: int = -1):
+        return io.BytesIO(self.raw_request)
+
+    def sendall(self, data: bytes):
+        self.writes += 1
+        self.sent += data
+
+    def setsockopt(self, *args):
+        pass
+
+
+class Response:
+    """A parsed handler response"""
+
+    def __init__(self, raw: bytes, writes: int):
+        head, _, self.body = raw.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        self.status = int(lines[0].split()[1])
+        self.headers = {}
+        for line in lines[1:]:
+            key, _, value = line.partition(':')
+            self.headers[key.strip().lower()] = value.strip()
+        self.writes = writes
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+def request(handler_cls, method: str, path: str, body: bytes = b'',
+            headers: Optional[Dict[str, str]] = None) -> Response:
+    """Run one HTTP/1.1 request through a handler class (access log discarded)"""
+    lines = [f'{method} {path} HTTP/1.1', 'Host: localhost']
+    for key, value in (headers or {}).items():
+        lines.append(f'{key}: {value}')
+    if body or method == 'POST':
+        lines.append(f'Content-Length: {len(body)}')
+    sock = FakeSocket(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
+    with redirect_stderr(io.StringIO()):
+        handler_cls(sock, ('127.0.0.1', 0), None)
+    return Response(bytes(sock.sent), sock.writes)
+
+
+def post_json(handler_cls, path: str, data: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    return request(handler_cls, 'POST', path, json.dumps(data).encode(),
+                   dict({'Content-Type': 'application/json'}, **(headers or {})))
@@ -0,0 +1,139 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+BalanceCache against SQLiteVerdictStore: leasing, refunds, debt and
+store outages.
+
+    python3 -m unittest discover tests
+"""
+
+import unittest
+
+from helpers import FlakyStore, cases
+
+from _balance_cache import BalanceCache
+from _verdict_store import SQLiteVerdictStore
+
+USER = 'cache@test.local'
+
+
+class BalanceCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sqlite = SQLiteVerdictStore()
+        self.sqlite.set_balance(USER, trial=0, purchased=10)
+        self.store = FlakyStore(self.sqlite)
+
+    def cache(self, **kwargs) -> BalanceCache:
+        cache = BalanceCache(self.store, lease_size=kwargs.pop('lease_size', 4), **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def recorded(self) -> int:
+        return self.sqlite.connection.execute(
+            'SELECT COUNT(*) FROM verdict_usage WHERE user_email = ?', (USER,)).fetchone()[0]
+
+    def balance(self) -> int:
+        return self.sqlite.get_balance(USER)['total_verdicts']
+
+    def test_serves_from_lease_and_denies_past_balance(self):
+        cache = self.cache()
+        served = sum(cache.consume(USER, cases('A', 1))['allowed'] for _ in range(12))
+        cache.close()
+
+        self.assertEqual(served, 10)
+        self.assertEqual(self.recorded(), 10)
+        self.assertEqual(self.balance(), 0)
+        # One store call per lease, not per prediction
+        self.assertEqual(cache.stats()['reservations'], 5)
+
+    def test_unknown_user_is_denied(self):
+        result = self.cache().consume('nobody@test.local', cases('N', 1))
+        self.assertFalse(result['allowed'])
+        self.assertNotIn('unavailable', result)
+
+    def test_reservation_locks_are_dropped_with_leases(self):
+        cache = self.cache()
+        cache.consume('nobody@test.local', cases('L', 1))
+        cache.consume(USER, cases('L', 1))
+        cache.flush()
+        self.assertEqual(list(cache._reserve_locks), [USER])
+
+        cache.close()
+        self.assertEqual(cache._reserve_locks, {})
+
+    def test_refund_returns_verdict_to_lease(self):
+        cache = self.cache()
+        charged = cases('R', 2)
+        self.assertTrue(cache.consume(USER, charged)['allowed'])
+        cache.refund(USER, charged)
+        cache.close()
+
+        self.assertEqual(self.recorded(), 0)
+        self.assertEqual(self.balance(), 10)
+        self.assertEqual(self.sqlite.reserve(USER, 10, 30)['granted'], 10)
+
+    def test_instances_never_exceed_balance_plus_overdraft(self):
+        overdraft = 3
+        caches = [self.cache(max_overdraft=overdraft) for _ in range(5)]
+        served = 0
+        for _ in range(10):
+            for cache in caches:
+                served += cache.consume(USER, cases('O', 1))['allowed']
+                cache.flush()
+        for cache in caches:
+            cache.close()
+
+        self.assertEqual(served, 10 + overdraft)
+        self.assertEqual(self.recorded(), 10 + overdraft)
+
+    def test_store_outage_reports_unavailable(self):
+        cache = self.cache()
+        self.store.down = True
+        result = cache.consume(USER, cases('U', 1))
+
+        self.assertFalse(result['allowed'])
+        self.assertTrue(result['unavailable'])
+
+    def test_retryable_reconcile_failure_requeues_usage(self):
+        cache = self.cache()
+        self.assertTrue(cache.consume(USER, cases('Q', 3))['allowed'])
+
+        self.store.down = True
+        cache.flush()
+        self.assertEqual(self.recorded(), 0)
+        self.assertEqual(cache.stats()['pending_usage'], 3)
+        self.assertEqual(cache.stats()['reconcile_failures'], 1)
+
+        self.store.down = False
+        cache.flush()
+        self.assertEqual(self.recorded(), 3)
+        self.assertEqual(cache.stats()['pending_usage'], 0)
+
+    def test_debt_is_replayed_after_top_up(self):
+        cache = self.cache(lease_size=2)
+        self.assertTrue(cache.consume(USER, cases('D', 2))['allowed'])
+
+        # The lease lapses in the store before the usage is recorded, and the
+        # balance is spent meanwhile
+        self.sqlite.connection.execute('UPDATE verdict_leases SET expires_at = 0')
+        self.sqlite.set_balance(USER, trial=0, purchased=0)
+        self.sqlite.reserve(USER, 1, 30)
+        cache.flush()
+        self.assertEqual(cache.stats()['unrecorded_debt'], 2)
+        self.assertEqual(self.recorded(), 0)
+
+        # No balance: the debt stays and the user is refused
+        self.assertFalse(cache.consume(USER, cases('D2', 1))['allowed'])
+
+        self.sqlite.set_balance(USER, trial=0, purchased=5)
+        self.assertTrue(cache.consume(USER, cases('D3', 1))['allowed'])
+        cache.close()
+
+        self.assertEqual(cache.stats()['unrecorded_debt'], 0)
+        self.assertEqual(self.recorded(), 3)
+        self.assertEqual(self.balance(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+/api/predict response negotiation: format/layout/fields/precision query
+parameters, Accept and Accept-Encoding.
+
+    python3 -m unittest discover tests
+"""
+
+import gzip
+import unittest
+from unittest import mock
+
+from helpers import load_api_module, post_json
+
+import _runtime
+from _runtime import RequestError, accepted_encoding
+
+MISSING = {'msgpack': None, 'brotli': None}
+INSTALLED = object()  # accepted_encoding only checks that the codec imported
+
+
+def batch(count: int):
+    return {'cases': [{'case_id': f'ENC-{i}', 'opinion_text': 'Precedent supports the petitioner.'}
+                      for i in range(count)]}
+
+
+class ResponseOptionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.predict = load_api_module('predict')
+
+    def options(self, path: str, accept: str = ''):
+        return self.predict.response_options(path, accept)
+
+    def assertRejected(self, status: int, path: str):
+        with self.assertRaises(RequestError) as raised:
+            self.options(path)
+        self.assertEqual(raised.exception.status, status, path)
+
+    def test_defaults(self):
+        self.assertEqual(self.options('/api/predict'),
+                         {'format': 'json', 'layout': 'rows', 'fields': None, 'precision': None})
+
+    def test_query_parameters(self):
+        options = self.options('/api/predict?layout=columnar&fields=case_id,%20probability,&precision=2')
+        self.assertEqual(options['layout'], 'columnar')
+        self.assertEqual(options['fields'], ('case_id', 'probability'))
+        self.assertEqual(options['precision'], 2)
+
+    def test_invalid_parameters_are_400(self):
+        for path in ('/api/predict?format=xml', '/api/predict?layout=tree',
+                     '/api/predict?fields=case_id,secret', '/api/predict?precision=16',
+                     '/api/predict?precision=-1', '/api/predict?precision=two'):
+            self.assertRejected(400, path)
+
+    def test_msgpack_without_the_module(self):
+        with mock.patch.dict(_runtime._optional_modules, MISSING):
+            self.assertRejected(406, '/api/predict?format=msgpack')
+            # Accept is a preference, so it falls back to JSON instead
+            self.assertEqual(self.options('/api/predict', 'application/msgpack')['format'], 'json')
+
+    @unittest.skipUnless(_runtime.optional_module('msgpack'), 'msgpack not installed')
+    def test_accept_msgpack(self):
+        for accept in ('application/msgpack', 'application/x-msgpack, application/json;q=0.5'):
+            self.assertEqual(self.options('/api/predict', accept)['format'], 'msgpack')
+
+
+class ShapeResponseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.predict = load_api_module('predict')
+
+    def options(self, **overrides):
+        return dict({'format': 'json', 'layout': 'rows', 'fields': None, 'precision': None}, **overrides)
+
+    def test_single_prediction_keeps_envelope(self):
+        response = dict(self.predict.predict_case({'case_id': 'ENC-1'}),
+                        processing_time_ms=1.23456, timestamp='now')
+        shaped = self.predict.shape_response(response, self.options(fields=('case_id', 'probability'),
+                                                                    precision=1))
+
+        self.assertEqual(set(shaped), {'case_id', 'probability', 'processing_time_ms', 'timestamp'})
+        self.assertEqual(shaped['probability'], round(response['probability'], 1))
+        # Envelope values are not rounded
+        self.assertEqual(shaped['processing_time_ms'], 1.23456)
+
+    def test_precision_rounds_model_predictions(self):
+        response = self.predict.predict_case({'case_id': 'ENC-2'})
+        shaped = self.predict.shape_response(response, self.options(precision=0))
+        for model in shaped['model_predictions']:
+            self.assertIn(model['probability'], (0, 1))
+        self.assertNotEqual(response['model_predictions'], shaped['model_predictions'])
+
+    def test_columnar_batch(self):
+        response = self.predict.predict_batch(batch(3)['cases'])
+        shaped = self.predict.shape_response(response, self.options(layout='columnar',
+                                                                    fields=('case_id', 'probability')))
+
+        self.assertNotIn('results', shaped)
+        self.assertEqual(shaped['layout'], 'columnar')
+        self.assertEqual(shaped['count'], 3)
+        self.assertEqual(shaped['columns'], {
+            'case_id': ['ENC-0', 'ENC-1', 'ENC-2'],
+            'probability': [result['probability'] for result in response['results']],
+        })
+
+    def test_to_columnar_model_predictions(self):
+        results = self.predict.predict_batch(batch(2)['cases'])['results']
+        columns = self.predict.to_columnar(results, ('model_predictions',))
+
+        models = results[0]['model_predictions']
+        self.assertEqual(columns['model_names'], [model['model_name'] for model in models])
+        self.assertEqual(columns['model_outcomes'][1],
+                         [model['outcome'] for model in results[1]['model_predictions']])
+        self.assertEqual(len(columns['model_confidences']), 2)
+        self.assertEqual(self.predict.to_columnar([], ('model_predictions', 'case_id')), {
+            'case_id': [], 'model_names': [], 'model_outcomes': [],
+            'model_probabilities': [], 'model_confidences': []})
+
+
+class AcceptedEncodingTest(unittest.TestCase):
+
+    def test_without_brotli(self):
+        with mock.patch.dict(_runtime._optional_modules, MISSING):
+            self.assertEqual(accepted_encoding('gzip, deflate, br'), 'gzip')
+            self.assertEqual(accepted_encoding('*'), 'gzip')
+            self.assertIsNone(accepted_encoding('br'))
+
+    def test_q_values(self):
+        with mock.patch.dict(_runtime._optional_modules, {'brotli': INSTALLED}):
+            self.assertEqual(accepted_encoding('gzip, br;q=0.5'), 'br')
+            self.assertEqual(accepted_encoding('br;q=0, gzip;q=0.1'), 'gzip')
+            self.assertEqual(accepted_encoding('*;q=0.2, br;q=0'), 'gzip')
+            for header in (None, '', 'identity', 'br;q=0, gzip;q=0', '*;q=0', 'gzip;q=x', 'GZIP;Q=0'):
+                self.assertIsNone(accepted_encoding(header), header)
+
+    def test_large_batch_is_gzipped(self):
+        predict = load_api_module('predict')
+        with mock.patch.dict(_runtime._optional_modules, MISSING):
+            response = post_json(predict.handler, '/api/predict?layout=columnar', batch(20),
+                                 {'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        body = _runtime.loads(gzip.decompress(response.body))
+        self.assertEqual(body['count'], 20)
+        self.assertEqual(len(body['columns']['case_id']), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+/api/predict with the verdict gate on: the charged user comes from the
+Supabase access token, and store outages are 503s rather than 402s.
+
+    python3 -m unittest discover tests
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+import unittest
+
+from helpers import FlakyStore, load_api_module, request
+
+import _auth
+from _balance_cache import BalanceCache
+from _verdict_store import SQLiteVerdictStore
+
+SECRET = 'test-jwt-secret'
+USER = 'gate@test.local'
+CASE = json.dumps({'case_id': 'GATE-1', 'opinion_text': 'Strong evidence.'}).encode()
+
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def access_token(claims, secret: str = SECRET) -> str:
+    signing_input = b64(json.dumps({'alg': 'HS256', 'typ': 'JWT'}).encode()) + '.' + b64(json.dumps(claims).encode())
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return signing_input + '.' + b64(signature)
+
+
+class PredictGateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.predict = load_api_module('predict')
+        self.sqlite = SQLiteVerdictStore()
+        self.sqlite.set_balance(USER, trial=0, purchased=1)
+        self.store = FlakyStore(self.sqlite)
+        cache = BalanceCache(self.store)
+        self.addCleanup(cache.close)
+
+        saved = (self.predict.VERDICT_GATE, self.predict.VERDICT_GATE_STATS,
+                 self.predict._balance_cache, _auth.SUPABASE_JWT_SECRET)
+        self.predict.VERDICT_GATE, self.predict._balance_cache, _auth.SUPABASE_JWT_SECRET = True, cache, SECRET
+        self.addCleanup(self.restore, saved)
+
+    def restore(self, saved):
+        (self.predict.VERDICT_GATE, self.predict.VERDICT_GATE_STATS,
+         self.predict._balance_cache, _auth.SUPABASE_JWT_SECRET) = saved
+
+    def post(self, token=None, body: bytes = CASE):
+        headers = {'Content-Type': 'application/json'}
+        if token is not None:
+            headers['Authorization'] = f'Bearer {token}'
+        response = request(self.predict.handler, 'POST', '/api/predict', body, headers)
+        return response.status, response.json()
+
+    def test_charges_the_token_email(self):
+        status, payload = self.post(access_token({'email': USER, 'exp': time.time() + 60}))
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['verdicts_remaining'], 0)
+
+        status, _ = self.post(access_token({'email': USER, 'exp': time.time() + 60}))
+        self.assertEqual(status, 402)
+
+    def test_body_email_is_ignored(self):
+        body = json.dumps({'case_id': 'GATE-2', 'user_email': USER}).encode()
+        status, _ = self.post(body=body)
+        self.assertEqual(status, 401)
+
+    def test_rejects_bad_tokens(self):
+        for token in (access_token({'email': USER, 'exp': time.time() + 60}, secret='wrong'),
+                      access_token({'email': USER, 'exp': time.time() - 3600}),
+                      access_token({'exp': time.time() + 60}),
+                      'not-a-token'):
+            status, _ = self.post(token)
+            self.assertEqual(status, 401, token)
+
+    def test_non_object_batch_cases_are_400(self):
+        token = access_token({'email': USER, 'exp': time.time() + 60})
+        for cases in ([1, 2], [{'case_id': 'GATE-3'}, None], ['GATE-4']):
+            status, payload = self.post(token, json.dumps({'cases': cases}).encode())
+            self.assertEqual(status, 400, cases)
+            self.assertEqual(payload['error'], 'Every case in a batch must be an object')
+
+        # Nothing was charged: the one verdict still buys a prediction
+        status, _ = self.post(token)
+        self.assertEqual(status, 200)
+
+        self.predict.VERDICT_GATE = False
+        status, _ = self.post(body=json.dumps({'cases': [1, 2]}).encode())
+        self.assertEqual(status, 400)
+
+    def test_store_outage_is_503(self):
+        self.store.down = True
+        status, payload = self.post(access_token({'email': USER, 'exp': time.time() + 60}))
+        self.assertEqual(status, 503)
+        self.assertEqual(payload['error'], 'Verdict balance unavailable')
+
+    def test_stats_hidden_unless_enabled(self):
+        self.predict.VERDICT_GATE_STATS = False
+        hidden = request(self.predict.handler, 'GET', '/api/predict').status
+        self.predict.VERDICT_GATE_STATS = True
+        shown = request(self.predict.handler, 'GET', '/api/predict').status
+        self.assertEqual((hidden, shown), (404, 200))
+
+
+if __name__ == '__main__':
+    unittest.main()
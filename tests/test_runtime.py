@@ -0,0 +1,69 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+The shared JSONHandler runtime: body limits, JSON validation, single-write
+responses and JSON encoding of non-string keys.
+
+    python3 -m unittest discover tests
+"""
+
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from helpers import load_api_module, post_json, request
+
+import _runtime
+
+
+class RuntimeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.track_visit = load_api_module('track-visit')
+
+    def post(self, body: bytes):
+        with redirect_stdout(io.StringIO()):
+            return request(self.track_visit.handler, 'POST', '/api/track-visit', body,
+                           {'Content-Type': 'application/json'})
+
+    def test_dumps_accepts_non_str_keys(self):
+        data = {7: 1, None: 2, 'page': 3}
+        self.assertEqual(json.loads(_runtime.dumps(data)), json.loads(json.dumps(data)))
+
+    def test_non_str_pages_do_not_break_later_requests(self):
+        with redirect_stdout(io.StringIO()):
+            for page in (7, None, '7'):
+                response = post_json(self.track_visit.handler, '/api/track-visit', {'page': page})
+                self.assertEqual(response.status, 200, page)
+
+        response = request(self.track_visit.handler, 'GET', '/api/track-visit')
+        self.assertEqual(response.status, 200)
+        self.assertGreaterEqual(response.json()['stats']['page_views']['7'], 2)
+
+    def test_oversized_body_is_413(self):
+        limit = self.track_visit.handler.route.max_body_bytes
+        response = self.post(b'{"page": "%s"}' % (b'x' * limit))
+        self.assertEqual(response.status, 413)
+        self.assertFalse(response.json()['success'])
+
+    def test_invalid_json_is_400(self):
+        for body in (b'{not json', b'[1, 2]', b'"page"', b'null', b''):
+            response = self.post(body)
+            self.assertEqual(response.status, 400, body)
+            self.assertFalse(response.json()['success'])
+
+    def test_responses_are_a_single_write(self):
+        responses = (
+            self.post(b'{"page": "home"}'),
+            self.post(b'[1]'),
+            request(self.track_visit.handler, 'OPTIONS', '/api/track-visit'),
+        )
+        for response in responses:
+            self.assertEqual(response.writes, 1)
+            self.assertEqual(int(response.headers['content-length']), len(response.body))
+            self.assertEqual(response.headers['access-control-allow-origin'], '*')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Copyright (c) 2025 Joshua Hendricks Cole (DBA: Corporation of Light). All Rights Reserved. PATENT PENDING.
+
+Square configuration and signed payment intents: catalog versus built-in
+package prices, and process_payment charging only an unexpired, untampered
+quote. Runs in demo mode; nothing is fetched from Square.
+
+    python3 -m unittest discover tests
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from helpers import load_api_module, post_json
+
+import _square_config
+from _square_config import SquareConfigService, intent_signature
+
+PATH = '/api/square-payment'
+LOCATIONS = [
+    {'id': 'LOC-CLOSED', 'name': 'Old studio', 'status': 'INACTIVE', 'currency': 'USD'},
+    {'id': 'LOC-MAIN', 'name': 'Main', 'status': 'ACTIVE', 'currency': 'CAD'},
+]
+
+
+def catalog_price(item_name: str, sku: str, amount: int, currency: str = 'USD'):
+    return {'item_name': item_name, 'sku': sku, 'amount': amount, 'currency': currency,
+            'catalog_object_id': f'VAR-{sku or item_name}'}
+
+
+def snapshot(catalog):
+    return {'source': 'test', 'fetched_at': time.time(), 'locations': LOCATIONS, 'catalog': catalog}
+
+
+class SquareConfigTest(unittest.TestCase):
+
+    def setUp(self):
+        self.square_payment = load_api_module('square-payment')
+
+        for patcher in (mock.patch.object(_square_config, 'SQUARE_ACCESS_TOKEN', ''),
+                        mock.patch.object(_square_config, 'SQUARE_LOCATION_ID', ''),
+                        mock.patch.object(_square_config, 'SQUARE_INTENT_SECRET', 'test-intent-secret'),
+                        mock.patch.object(self.square_payment, 'SQUARE_ACCESS_TOKEN', '')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.config = SquareConfigService(self.square_payment.PACKAGES,
+                                          cache_path=os.path.join(cache_dir.name, 'square.json'))
+        self.config.warm()
+        patcher = mock.patch.object(self.square_payment, 'square_config', self.config)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create(self, package: str = 'single'):
+        response = post_json(self.square_payment.handler, PATH, {
+            'action': 'create_payment', 'package': package, 'email': 'buyer@test.local'})
+        self.assertEqual(response.status, 200)
+        return response.json()['payment_intent']
+
+    def process(self, intent, **overrides):
+        data = {key: intent[key] for key in
+                ('package', 'idempotency_key', 'amount', 'currency', 'expires_at', 'signature')}
+        data.update(action='process_payment', source_id='cnon:card-nonce-ok', email='buyer@test.local')
+        data.update(overrides)
+        return post_json(self.square_payment.handler, PATH, data)
+
+    # ------------------------------------------------------------
+    # Prices
+    # ------------------------------------------------------------
+
+    def test_built_in_prices_until_first_fetch(self):
+        intent = self.create('professional')
+        self.assertEqual((intent['amount'], intent['currency']), (39900, 'USD'))
+        self.assertNotIn('catalog_object_id', intent)
+        self.assertEqual(self.config.source, 'environment')
+
+    def test_catalog_prices_by_sku_then_item_name(self):
+        self.config._apply(snapshot([
+            catalog_price('Pro (renamed in Square)', 'professional', 34900),
+            catalog_price('Pro duplicate', 'professional', 1),
+            catalog_price('firm package', '', 89900, 'CAD'),
+            catalog_price('Gift card', 'gift', 5000),
+        ]), 'square')
+
+        professional, firm = self.config.package('professional'), self.config.package('firm')
+        self.assertEqual((professional['amount'], professional['catalog_object_id']), (34900, 'VAR-professional'))
+        self.assertEqual((firm['amount'], firm['currency']), (89900, 'CAD'))
+
+        # Not in the catalog: built-in amount in the location's currency
+        single = self.config.package('single')
+        self.assertEqual((single['amount'], single['currency']), (3900, 'CAD'))
+        self.assertNotIn('catalog_object_id', single)
+        self.assertEqual(self.config.location_id, 'LOC-MAIN')
+
+    # ------------------------------------------------------------
+    # Signed quotes
+    # ------------------------------------------------------------
+
+    def test_quote_round_trip(self):
+        intent = self.config.payment_intent('firm', 'idem-1', None, None)['payment_intent']
+        self.assertEqual(intent['signature'],
+                         intent_signature('firm', 99900, 'USD', 'idem-1', intent['expires_at']))
+        self.assertEqual(self.config.quoted_package(intent)['amount'], 99900)
+
+    def test_process_charges_the_quoted_price(self):
+        intent = self.create('single')
+        self.config._apply(snapshot([catalog_price('Single Verdict', 'single', 4900)]), 'square')
+        self.assertEqual(self.create('single')['amount'], 4900)
+
+        response = self.process(intent)
+        self.assertEqual(response.status, 200)
+        result = response.json()
+        self.assertTrue(result['success'])
+        self.assertEqual((result['amount'], result['currency']), (3900, 'USD'))
+        self.assertEqual(result['allocation']['allocation']['amount_paid'], 39.0)
+
+    def test_tampered_quote_is_400(self):
+        intent = self.create('firm')
+        for overrides in ({'amount': 100}, {'currency': 'JPY'}, {'package': 'single'},
+                          {'idempotency_key': 'another-attempt'}, {'expires_at': intent['expires_at'] + 60},
+                          {'signature': '0' * 64}, {'signature': None}, {'amount': 'free'}):
+            response = self.process(intent, **overrides)
+            self.assertEqual(response.status, 400, overrides)
+            self.assertFalse(response.json()['success'])
+
+    def test_expired_quote_is_409(self):
+        expires_at = int(time.time()) - 1
+        intent = dict(self.create('single'), expires_at=expires_at,
+                      signature=intent_signature('single', 3900, 'USD', 'idem-old', expires_at),
+                      idempotency_key='idem-old')
+        response = self.process(intent)
+        self.assertEqual(response.status, 409)
+        self.assertEqual(response.json()['error'], 'Price quote expired; please start the purchase again')
+
+    def test_unknown_package_is_400(self):
+        intent = self.create('single')
+        response = self.process(intent, package='enterprise')
+        self.assertEqual(response.status, 400)
+        self.assertEqual(response.json()['error'], 'Invalid package type')
+
+
+if __name__ == '__main__':
+    unittest.main()